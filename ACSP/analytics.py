@@ -0,0 +1,177 @@
+import threading
+from collections import namedtuple
+from datetime import date
+from .database import (
+    add_change_listener, fetch_first_maintenance_day, fetch_history_events, fetch_last_service_before,
+    MAINTENANCE_INTERVAL_DAYS, WARNING_DAYS
+)
+
+# Days-since-service histogram: 10-day bins, the last one open-ended (90+)
+HISTOGRAM_BIN_DAYS = 10
+HISTOGRAM_BINS = 10
+
+class TrendPoint(namedtuple('TrendPoint', 'day tracked warning overdue mean_days histogram')):
+    """
+    Fleet state on one day. tracked counts units serviced at least once so
+    far; histogram counts them per days-since-service bin.
+    """
+    __slots__ = ()
+
+    @property
+    def overdue_rate(self):
+        return self.overdue / self.tracked * 100 if self.tracked else 0.0
+
+    @property
+    def warning_rate(self):
+        return self.warning / self.tracked * 100 if self.tracked else 0.0
+
+
+def sweep(last_service, events, start, end):
+    """
+    Replays service events over the day ordinals start..end in one pass.
+
+    last_service maps unit -> ordinal of its last service before start;
+    events are (unit, ordinal) pairs within start..end, sorted by ordinal.
+    Each service opens an interval that lasts until the unit's next service.
+    Intervals are added to difference arrays, so the cost is
+    O(events + days), not O(days * units).
+
+    Returns (list of TrendPoint, last_service as of end).
+    """
+    num_days = end - start + 1
+    if num_days <= 0:
+        return [], dict(last_service)
+
+    size = num_days + 1
+    tracked = [0] * size
+    sum_service = [0] * size
+    warning = [0] * size
+    overdue = [0] * size
+    histogram = [[0] * size for _ in range(HISTOGRAM_BINS)]
+    warning_from = MAINTENANCE_INTERVAL_DAYS - WARNING_DAYS + 1
+    overdue_from = MAINTENANCE_INTERVAL_DAYS + 1
+
+    def add(diff, lo, hi, value=1):
+        # Adds value on day ordinals [lo, hi), clipped to the range
+        lo = max(lo, start) - start
+        hi = min(hi, end + 1) - start
+        if lo < hi:
+            diff[lo] += value
+            diff[hi] -= value
+
+    def add_interval(service, lo, hi):
+        # Unit serviced on `service`, counted on days [lo, hi)
+        add(tracked, lo, hi)
+        add(sum_service, lo, hi, service)
+        add(warning, max(lo, service + warning_from), min(hi, service + overdue_from))
+        add(overdue, max(lo, service + overdue_from), hi)
+        for b in range(HISTOGRAM_BINS):
+            bin_lo = service + b * HISTOGRAM_BIN_DAYS
+            bin_hi = hi if b == HISTOGRAM_BINS - 1 else min(hi, bin_lo + HISTOGRAM_BIN_DAYS)
+            add(histogram[b], max(lo, bin_lo), bin_hi)
+
+    # unit -> (service ordinal, first day of the open interval)
+    open_intervals = {unit: (service, start) for unit, service in last_service.items()}
+    for unit, day in events:
+        if unit in open_intervals:
+            service, lo = open_intervals[unit]
+            add_interval(service, lo, day)
+        open_intervals[unit] = (day, day)
+    for service, lo in open_intervals.values():
+        add_interval(service, lo, end + 1)
+
+    points = []
+    t = s = w = o = 0
+    h = [0] * HISTOGRAM_BINS
+    for i in range(num_days):
+        t += tracked[i]
+        s += sum_service[i]
+        w += warning[i]
+        o += overdue[i]
+        for b in range(HISTOGRAM_BINS):
+            h[b] += histogram[b][i]
+        day = start + i
+        mean_days = (day * t - s) / t if t else 0.0
+        points.append(TrendPoint(date.fromordinal(day), t, w, o, mean_days, tuple(h)))
+
+    return points, {unit: service for unit, (service, _) in open_intervals.items()}
+
+
+class _TrendCache:
+    def __init__(self, start, points, last_service):
+        self.start = start
+        self.points = points
+        self.last_service = last_service
+        # Earliest day whose cached point a write has made stale
+        self.dirty_from = None
+
+    @property
+    def end(self):
+        return self.start + len(self.points) - 1
+
+
+class TrendEngine:
+    """
+    Daily overdue-rate trend per equipment type, computed from
+    maintenance_history and cached. Later calls only sweep the days after
+    the cached range, or the days from the earliest edited date onwards.
+    """
+    def __init__(self):
+        self._cache = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        add_change_listener(self.invalidate)
+
+    def invalidate(self, dates=None):
+        """Marks cached days from the earliest given date on as stale (all if None)."""
+        with self._lock:
+            self._generation += 1
+            if dates is None:
+                self._cache.clear()
+                return
+            earliest = min(date.fromisoformat(d).toordinal() for d in dates)
+            for entry in self._cache.values():
+                if entry.dirty_from is None or earliest < entry.dirty_from:
+                    entry.dirty_from = earliest
+
+    def trend(self, eq_type, today=None):
+        """
+        Returns one TrendPoint per day from the type's first service to today.
+        Intended to run on the database worker thread.
+        """
+        end = (today or date.today()).toordinal()
+        with self._lock:
+            generation = self._generation
+            entry = self._cache.get(eq_type)
+            dirty_from = entry.dirty_from if entry else None
+
+        if entry is not None and dirty_from is not None and dirty_from <= entry.start:
+            entry = None  # Edited before the cached range began
+
+        if entry is None:
+            first = fetch_first_maintenance_day(eq_type)
+            if first is None:
+                return []
+            start = resume = first
+            points, last_service = [], {}
+        else:
+            start = entry.start
+            resume = entry.end + 1
+            last_service = entry.last_service
+            if dirty_from is not None and dirty_from < resume:
+                # Replay from the edit; rebuild the state just before it
+                resume = dirty_from
+                last_service = dict(fetch_last_service_before(eq_type, resume))
+            points = entry.points[:resume - start]
+
+        if resume <= end:
+            events = fetch_history_events(eq_type, resume, end)
+            new_points, last_service = sweep(last_service, events, resume, end)
+            points = points + new_points
+
+        with self._lock:
+            # Only cache if no write landed while we were computing
+            if generation == self._generation:
+                entry = _TrendCache(start, points, last_service)
+                self._cache[eq_type] = entry
+        return points
@@ -0,0 +1,268 @@
+from datetime import date
+from .database import (
+    fetch_equipment_days, fetch_undated_equipment, fetch_history_days,
+    MAINTENANCE_INTERVAL_DAYS, WARNING_DAYS
+)
+
+# Status kernel shared by the UI and the command-line tools (no tkinter).
+# Equipment and history are held as columns of day ordinals and computed on
+# whole columns at once: with NumPy when it is installed, otherwise with the
+# plain-list fallback, which gives the same results.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Status codes index into STATUSES
+GOOD, WARNING, OVERDUE = 0, 1, 2
+STATUSES = ('good', 'warning', 'overdue')
+
+def _column(values, dtype=None):
+    if np is not None:
+        return np.asarray(values, dtype=dtype)
+    return list(values)
+
+def _tolist(column):
+    return column.tolist() if np is not None else column
+
+def days_passed(last, today):
+    """Days since last service, for a column of last-service ordinals."""
+    if np is not None:
+        return today - last
+    return [today - d for d in last]
+
+def classify(days_passed):
+    """Status code per unit: OVERDUE after the interval, WARNING within WARNING_DAYS of it."""
+    overdue_after = MAINTENANCE_INTERVAL_DAYS
+    warning_after = MAINTENANCE_INTERVAL_DAYS - WARNING_DAYS
+    if np is not None:
+        codes = np.zeros(len(days_passed), dtype=np.int8)
+        codes[days_passed > warning_after] = WARNING
+        codes[days_passed > overdue_after] = OVERDUE
+        return codes
+    return [
+        OVERDUE if d > overdue_after else WARNING if d > warning_after else GOOD
+        for d in days_passed
+    ]
+
+def transition_days(last, codes):
+    """
+    Day ordinal on which each unit next changes status (Good->Warning or
+    Warning->OVERDUE); 0 for units that are already overdue.
+    """
+    to_warning = MAINTENANCE_INTERVAL_DAYS - WARNING_DAYS + 1
+    to_overdue = MAINTENANCE_INTERVAL_DAYS + 1
+    if np is not None:
+        days = np.where(codes == GOOD, last + to_warning, last + to_overdue)
+        days[codes == OVERDUE] = 0
+        return days
+    return [
+        0 if c == OVERDUE else d + (to_warning if c == GOOD else to_overdue)
+        for d, c in zip(last, codes)
+    ]
+
+def bin_days(days, bin_size):
+    """
+    Aggregates consecutive runs of bin_size units. Returns columns of
+    (min days, max days, overdue count, unit count) per bin.
+    """
+    if not len(days):
+        return [], [], [], []
+    if np is not None:
+        days = np.asarray(days)
+        starts = np.arange(0, len(days), bin_size)
+        sizes = np.diff(np.append(starts, len(days)))
+        return (
+            np.minimum.reduceat(days, starts).tolist(),
+            np.maximum.reduceat(days, starts).tolist(),
+            np.add.reduceat((days > MAINTENANCE_INTERVAL_DAYS).astype(np.int64), starts).tolist(),
+            sizes.tolist(),
+        )
+    mins, maxs, overdue, sizes = [], [], [], []
+    for i in range(0, len(days), bin_size):
+        chunk = days[i:i + bin_size]
+        mins.append(min(chunk))
+        maxs.append(max(chunk))
+        overdue.append(sum(1 for d in chunk if d > MAINTENANCE_INTERVAL_DAYS))
+        sizes.append(len(chunk))
+    return mins, maxs, overdue, sizes
+
+
+class FleetStatus:
+    """Status of every unit on one day, as parallel columns ordered by id."""
+    def __init__(self, fleet, today):
+        self.fleet = fleet
+        self.today = today
+        self.days_passed = days_passed(fleet.last, today.toordinal())
+        self.codes = classify(self.days_passed)
+
+    def _mask(self, eq_type=None, status=None):
+        # Indices of the units that match, or None for all of them
+        if eq_type is None and status is None:
+            return None
+        code = None if status is None else STATUSES.index(status)
+        if np is not None:
+            mask = np.ones(len(self.codes), dtype=bool)
+            if eq_type is not None:
+                mask &= self.fleet.types == eq_type
+            if code is not None:
+                mask &= self.codes == code
+            return np.flatnonzero(mask)
+        types = self.fleet.types
+        return [
+            i for i, c in enumerate(self.codes)
+            if (eq_type is None or types[i] == eq_type) and (code is None or c == code)
+        ]
+
+    def _take(self, column, index):
+        if index is None:
+            return _tolist(column)
+        if np is not None:
+            return column[index].tolist()
+        return [column[i] for i in index]
+
+    def ids(self, eq_type=None, status=None):
+        return self._take(self.fleet.ids, self._mask(eq_type, status))
+
+    def counts(self, eq_type=None):
+        """Returns (total, overdue, warning)."""
+        index = self._mask(eq_type)
+        if np is not None:
+            codes = self.codes if index is None else self.codes[index]
+            counts = np.bincount(codes, minlength=len(STATUSES))
+            return int(len(codes)), int(counts[OVERDUE]), int(counts[WARNING])
+        codes = self.codes if index is None else [self.codes[i] for i in index]
+        return len(codes), codes.count(OVERDUE), codes.count(WARNING)
+
+    def overdue_rate(self, eq_type=None):
+        """Percentage of units that are overdue."""
+        total, overdue, _ = self.counts(eq_type)
+        return overdue / total * 100 if total else 0.0
+
+    def rows(self, eq_type=None, status=None):
+        """
+        Returns (id, type, last_maintenance_date, days_passed, days_remaining,
+        status) rows ordered by id, optionally filtered by type and status.
+        """
+        index = self._mask(eq_type, status)
+        passed = self._take(self.days_passed, index)
+        if index is None:
+            dates = self.fleet.dates
+        else:
+            dates = [self.fleet.dates[i] for i in _tolist(index)]
+        return [
+            (eq_id, eq_type_, last_date, d, MAINTENANCE_INTERVAL_DAYS - d, STATUSES[c])
+            for eq_id, eq_type_, last_date, d, c in zip(
+                self._take(self.fleet.ids, index), self._take(self.fleet.types, index),
+                dates, passed, self._take(self.codes, index))
+        ]
+
+    def transitions(self):
+        """(day ordinal, id, new status, last ordinal) for every unit not yet overdue."""
+        days = _tolist(transition_days(self.fleet.last, self.codes))
+        return [
+            (day, eq_id, STATUSES[c + 1], last)
+            for day, eq_id, c, last in zip(
+                days, _tolist(self.fleet.ids), _tolist(self.codes), _tolist(self.fleet.last))
+            if c != OVERDUE
+        ]
+
+
+class FleetColumns:
+    """
+    The equipment table as columns: ids, types, last-service ordinals and
+    dates. Units without a readable last date cannot be placed in the
+    columns and are kept aside as undated (id, type, date text) rows.
+    """
+    def __init__(self, rows, undated=()):
+        # rows are (id, type, last_maintenance_date, last day ordinal)
+        ids, types, dates, last = zip(*rows) if rows else ((), (), (), ())
+        self.ids = _column(ids, 'int64')
+        self.types = _column(types, str)
+        self.last = _column(last, 'int64')
+        self.dates = list(dates)
+        self.undated = list(undated)
+
+    @classmethod
+    def load(cls):
+        return cls(fetch_equipment_days(), fetch_undated_equipment())
+
+    def __len__(self):
+        return len(self.dates)
+
+    def records(self):
+        """(id, type, last day ordinal) per unit, as plain Python values."""
+        return list(zip(_tolist(self.ids), _tolist(self.types), _tolist(self.last)))
+
+    def status(self, today=None):
+        return FleetStatus(self, today or date.today())
+
+
+class HistoryColumns:
+    """maintenance_history as (unit, day ordinal) columns sorted by unit, then day."""
+    def __init__(self, rows):
+        units, days = zip(*rows) if rows else ((), ())
+        self.units = _column(units, 'int64')
+        self.days = _column(days, 'int64')
+
+    @classmethod
+    def load(cls, eq_type=None):
+        return cls(fetch_history_days(eq_type))
+
+    def intervals(self):
+        """
+        Returns (units, gaps): the days between consecutive services of the
+        same unit, one entry per repeat service.
+        """
+        if np is not None:
+            if len(self.days) < 2:
+                return [], []
+            same = self.units[1:] == self.units[:-1]
+            gaps = np.diff(self.days)[same]
+            return self.units[1:][same].tolist(), gaps.tolist()
+        units, gaps = [], []
+        for i in range(1, len(self.days)):
+            if self.units[i] == self.units[i - 1]:
+                units.append(self.units[i])
+                gaps.append(self.days[i] - self.days[i - 1])
+        return units, gaps
+
+    def mean_intervals(self):
+        """Mean days between services per unit, for units serviced at least twice."""
+        units, gaps = self.intervals()
+        totals = {}
+        for unit, gap in zip(units, gaps):
+            total, count = totals.get(unit, (0, 0))
+            totals[unit] = (total + gap, count + 1)
+        return {unit: total / count for unit, (total, count) in totals.items()}
+
+
+def summarize(today=None):
+    """
+    Per-type fleet summary for reports: {type: (total, overdue, warning,
+    overdue rate, mean service interval or None)}.
+    """
+    status = FleetColumns.load().status(today)
+    means = HistoryColumns.load().mean_intervals()
+    types = sorted(set(_tolist(status.fleet.types)))
+    summary = {}
+    for eq_type in types:
+        total, overdue, warning = status.counts(eq_type)
+        gaps = [means[eq_id] for eq_id in status.ids(eq_type) if eq_id in means]
+        summary[eq_type] = (
+            total, overdue, warning, status.overdue_rate(eq_type),
+            sum(gaps) / len(gaps) if gaps else None
+        )
+    return summary
+
+def print_summary(today=None):
+    """Prints summarize() as a small table (used by the command-line tools)."""
+    print(f"{'Type':<8}{'Units':>7}{'Overdue':>9}{'Warning':>9}{'Rate':>8}{'Interval':>10}")
+    for eq_type, (total, overdue, warning, rate, interval) in summarize(today).items():
+        interval = f"{interval:.1f}d" if interval is not None else '-'
+        print(f"{eq_type:<8}{total:>7}{overdue:>9}{warning:>9}{rate:>7.1f}%{interval:>10}")
+    undated = fetch_undated_equipment()
+    if undated:
+        print(f"Undated: {len(undated)} units have no readable last maintenance date (not counted above):")
+        for eq_id, eq_type, last_date in undated:
+            print(f"  {eq_id} ({eq_type}): {last_date!r}")
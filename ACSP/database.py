@@ -1,46 +1,316 @@
+import atexit
+import os
 import sqlite3
-from datetime import datetime, timedelta
+import threading
+from datetime import date, datetime, timedelta
 
 DB_NAME = 'acsp.db'
 
+MAINTENANCE_INTERVAL_DAYS = 45
+WARNING_DAYS = 10  # 'Warning' once fewer than this many days remain
+
+# Status buckets (also used as Treeview tags) and their display text
+STATUS_LABELS = {
+    'good': 'Good',
+    'warning': 'Warning',
+    'overdue': 'OVERDUE',
+}
+
+# Applied once when a connection is opened, not per query.
+CONNECTION_PRAGMAS = (
+    ('cache_size', -16000),      # Negative = KiB, so ~16 MB page cache
+    ('busy_timeout', 5000),      # ms to wait on a locked database
+)
+# WAL and memory-mapped I/O need shared memory between the processes on one
+# host, so they break when acsp.db sits on a network share used by several
+# machines. journal_mode is also stored in the file, so one client enabling
+# WAL would switch every other host too. They are therefore opt-in
+# (ACSP_WAL=1) for a DB on a local disk that only this machine opens.
+WAL_MODE = os.environ.get('ACSP_WAL') == '1'
+LOCAL_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('mmap_size', 268435456),    # 256 MB
+)
+STATEMENT_CACHE_SIZE = 256
+
+# UPDATE ... FROM arrived in SQLite 3.33; older builds (e.g. early Python
+# 3.8 releases) get equivalent correlated-subquery statements instead.
+SUPPORTS_UPDATE_FROM = sqlite3.sqlite_version_info >= (3, 33, 0)
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+def _open_connection():
+    # check_same_thread=False only so close_connections() can close every
+    # thread's connection at shutdown; each connection is still used by one thread.
+    conn = sqlite3.connect(
+        DB_NAME,
+        timeout=5.0,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False,
+    )
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    if WAL_MODE and not _on_network_share(DB_NAME):
+        for name, value in LOCAL_PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+    elif conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal':
+        # An earlier client left the file in WAL; go back to the rollback journal
+        conn.execute('PRAGMA busy_timeout = 0')
+        try:
+            conn.execute('PRAGMA journal_mode = DELETE')
+        except sqlite3.OperationalError:
+            pass  # Another client still has it open; the next start retries
+        conn.execute(f'PRAGMA busy_timeout = {dict(CONNECTION_PRAGMAS)["busy_timeout"]}')
+    return conn
+
+def _on_network_share(path):
+    """True for UNC paths and (on Windows) mapped network drives."""
+    path = os.path.abspath(path)
+    if path.startswith(('\\\\', '//')):
+        return True
+    if os.name == 'nt':
+        import ctypes
+        drive = os.path.splitdrive(path)[0]
+        return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == 4  # DRIVE_REMOTE
+    return False
+
+def _is_open(conn):
+    try:
+        conn.total_changes
+        return True
+    except sqlite3.ProgrammingError:
+        return False
+
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """
+    Returns the calling thread's long-lived connection, opening and tuning it
+    on first use. Callers may still use it as a context manager (commit/rollback);
+    if a caller closes it, the next call transparently reopens it.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _is_open(conn):
+        return conn
+
+    with _connections_lock:
+        if conn is not None and conn in _connections:
+            _connections.remove(conn)
+        conn = _open_connection()
+        _connections.append(conn)
+    _local.conn = conn
+    return conn
+
+def close_connections():
+    """Closes every shared connection. Safe to call more than once."""
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    _local.conn = None
+
+atexit.register(close_connections)
 
 def init_database():
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        # Create equipment table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS equipment (
-                id INTEGER PRIMARY KEY,
-                last_maintenance_date TEXT,
-                next_maintenance_date TEXT,
-                type TEXT DEFAULT 'ARMGC'
-            )
+    """
+    Brings the schema up to SCHEMA_VERSION. When the database is already
+    current this costs a single PRAGMA read.
+    """
+    conn = get_connection()
+    if _schema_version(conn) >= SCHEMA_VERSION:
+        return
+
+    # IMMEDIATE takes the write lock up front so two clients starting at the
+    # same time cannot run the same migration twice.
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        version = _schema_version(conn)
+        for target, migrate in MIGRATIONS:
+            if version < target:
+                migrate(conn.cursor())
+                conn.execute(f'PRAGMA user_version = {target}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def _schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def schema_is_current():
+    """True when acsp.db exists and needs no migration (for read-only callers)."""
+    return os.path.exists(DB_NAME) and _schema_version(get_connection()) >= SCHEMA_VERSION
+
+def normalise_date(value):
+    """'2024-3-7', '2024/03/07', '2024-03-07 08:00:00' -> '2024-03-07'; None if unreadable."""
+    if value is None:
+        return None
+    text = str(value).strip().split(' ')[0].split('T')[0].replace('/', '-').replace('.', '-')
+    try:
+        year, month, day = (int(part) for part in text.split('-'))
+        return date(year, month, day).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+# -----------------------------------------------------------------------------
+# Migrations
+# -----------------------------------------------------------------------------
+def _migrate_base_schema(cursor):
+    # Written to be safe on databases created before versioning existed.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS equipment (
+            id INTEGER PRIMARY KEY,
+            last_maintenance_date TEXT,
+            next_maintenance_date TEXT,
+            type TEXT DEFAULT 'ARMGC'
+        )
+    ''')
+    
+    # Check if 'type' column exists (for migration)
+    cursor.execute("PRAGMA table_info(equipment)")
+    columns = [info[1] for info in cursor.fetchall()]
+    if 'type' not in columns:
+        cursor.execute("ALTER TABLE equipment ADD COLUMN type TEXT DEFAULT 'ARMGC'")
+    
+    # Create maintenance history table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            equipment_id INTEGER,
+            maintenance_date TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (equipment_id) REFERENCES equipment (id)
+        )
+    ''')
+    
+    # Populate initial equipment list if missing
+    _populate_initial_equipment(cursor)
+
+def _migrate_history_indexes(cursor):
+    # Drop duplicate (unit, date) records, keeping the oldest, so the
+    # unique index can be created on existing data.
+    cursor.execute('''
+        DELETE FROM maintenance_history
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM maintenance_history
+            GROUP BY equipment_id, maintenance_date
+        )
+    ''')
+    # Serves latest-per-unit lookups and update/delete by (unit, date)
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_history_equipment_date
+        ON maintenance_history (equipment_id, maintenance_date)
+    ''')
+    # Serves the calendar's date-range queries
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_history_date
+        ON maintenance_history (maintenance_date)
+    ''')
+
+# julianday() of 0001-01-01 is 1721425.5, so this yields date.toordinal()
+_ORDINAL_SQL = 'CAST(julianday({}) - 1721424.5 AS INTEGER)'
+
+def _migrate_day_columns(cursor):
+    # Integer day ordinals (date.toordinal()) next to each TEXT date, so
+    # ranges, ordering and day counts are plain integer comparisons. The
+    # TEXT columns stay authoritative for the legacy tools; triggers keep
+    # the day columns in sync on every write, including those tools' own.
+    cursor.execute("ALTER TABLE equipment ADD COLUMN last_maintenance_day INTEGER")
+    cursor.execute("ALTER TABLE equipment ADD COLUMN next_maintenance_day INTEGER")
+    cursor.execute("ALTER TABLE maintenance_history ADD COLUMN maintenance_day INTEGER")
+
+    equipment_days = f'''
+        UPDATE equipment
+        SET last_maintenance_day = {_ORDINAL_SQL.format('last_maintenance_date')},
+            next_maintenance_day = {_ORDINAL_SQL.format('next_maintenance_date')}
+    '''
+    history_days = f'''
+        UPDATE maintenance_history
+        SET maintenance_day = {_ORDINAL_SQL.format('maintenance_date')}
+    '''
+    cursor.execute(equipment_days)
+    cursor.execute(history_days)
+    for event in ('INSERT', 'UPDATE OF last_maintenance_date, next_maintenance_date'):
+        name = 'insert' if event == 'INSERT' else 'update'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_equipment_days_{name}
+            AFTER {event} ON equipment
+            BEGIN {equipment_days} WHERE id = NEW.id; END
         ''')
-        
-        # Check if 'type' column exists (for migration)
-        cursor.execute("PRAGMA table_info(equipment)")
-        columns = [info[1] for info in cursor.fetchall()]
-        if 'type' not in columns:
-            cursor.execute("ALTER TABLE equipment ADD COLUMN type TEXT DEFAULT 'ARMGC'")
-        
-        # Create maintenance history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS maintenance_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                equipment_id INTEGER,
-                maintenance_date TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (equipment_id) REFERENCES equipment (id)
-            )
+    for event in ('INSERT', 'UPDATE OF maintenance_date'):
+        name = 'insert' if event == 'INSERT' else 'update'
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_history_day_{name}
+            AFTER {event} ON maintenance_history
+            BEGIN {history_days} WHERE id = NEW.id; END
         ''')
-        
-        
-        # Populate initial equipment list if missing
-        _populate_initial_equipment(cursor)
-        
-        conn.commit()
+
+    # Range queries move to the integer column
+    cursor.execute('DROP INDEX IF EXISTS idx_history_date')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_history_day
+        ON maintenance_history (maintenance_day)
+    ''')
+
+def _migrate_normalise_dates(cursor):
+    # Dates written before every writer normalised them ('2026-9-2',
+    # '2026/09/02 08:00') have NULL day columns; rewrite the readable ones
+    # so the triggers fill the days in. Unreadable values are left for
+    # fetch_undated_equipment() to report.
+    rows = cursor.execute('''
+        SELECT id, last_maintenance_date, next_maintenance_date FROM equipment
+        WHERE last_maintenance_day IS NULL OR next_maintenance_day IS NULL
+    ''').fetchall()
+    for eq_id, last_date, next_date in rows:
+        fixed = (normalise_date(last_date) or last_date, normalise_date(next_date) or next_date)
+        if fixed != (last_date, next_date):
+            cursor.execute('''
+                UPDATE equipment SET last_maintenance_date = ?, next_maintenance_date = ?
+                WHERE id = ?
+            ''', (*fixed, eq_id))
+
+    rows = cursor.execute('''
+        SELECT id, equipment_id, maintenance_date FROM maintenance_history
+        WHERE maintenance_day IS NULL
+    ''').fetchall()
+    for history_id, eq_id, date_str in rows:
+        fixed = normalise_date(date_str)
+        if fixed is None:
+            continue
+        # The normalised record may already exist; keep that one
+        if cursor.execute('''
+            SELECT 1 FROM maintenance_history WHERE equipment_id = ? AND maintenance_date = ?
+        ''', (eq_id, fixed)).fetchone():
+            cursor.execute("DELETE FROM maintenance_history WHERE id = ?", (history_id,))
+        else:
+            cursor.execute("UPDATE maintenance_history SET maintenance_date = ? WHERE id = ?", (fixed, history_id))
+
+def _migrate_import_checkpoints(cursor):
+    # Per legacy source: how far the last import got (see import_legacy.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL,
+            row_hash TEXT NOT NULL,
+            max_date TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+# (version, migration) pairs, applied in order. Append new steps; never edit
+# a step that has already shipped.
+MIGRATIONS = (
+    (1, _migrate_base_schema),
+    (2, _migrate_history_indexes),
+    (3, _migrate_day_columns),
+    (4, _migrate_import_checkpoints),
+    (5, _migrate_normalise_dates),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
 
 def _populate_initial_equipment(cursor):
     # ARMGC: 211-272
@@ -86,28 +356,102 @@ def calculate_equipment_status(conn, equipment_id):
     Recalculates the last and next maintenance dates for an equipment 
     based on its most recent history entry.
     """
-    cursor = conn.cursor()
-    cursor.execute('''
-        SELECT maintenance_date FROM maintenance_history 
-        WHERE equipment_id = ? 
-        ORDER BY maintenance_date DESC 
-        LIMIT 1
-    ''', (equipment_id,))
-    row = cursor.fetchone()
-    
-    if row:
-        last_date_str = row[0]
-        last_date = datetime.strptime(last_date_str, '%Y-%m-%d')
-        next_date = last_date + timedelta(days=45)
-        
-        cursor.execute('''
-            UPDATE equipment 
-            SET last_maintenance_date = ?, 
-                next_maintenance_date = ?
-            WHERE id = ?
-        ''', (last_date_str, next_date.strftime('%Y-%m-%d'), equipment_id))
+    recalculate_equipment_status(conn, [equipment_id])
+
+def recalculate_equipment_status(conn, equipment_ids=None):
+    """
+    Set-based version of calculate_equipment_status: refreshes the last/next
+    maintenance dates of the given units (or the whole fleet when
+    equipment_ids is None) from MAX(maintenance_date) per unit.
+    Returns the number of equipment rows that actually changed.
+    """
+    if equipment_ids is None:
+        return _recalculate_status_batch(conn, None)
+
+    ids = list(set(equipment_ids))
+    changed = 0
+    for i in range(0, len(ids), _ID_BATCH_SIZE):
+        changed += _recalculate_status_batch(conn, ids[i:i + _ID_BATCH_SIZE])
+    return changed
+
+# Stays below SQLite's historic 999 bound-parameter limit
+_ID_BATCH_SIZE = 500
+
+def _recalculate_status_batch(conn, ids):
+    where = ''
+    params = [f'+{MAINTENANCE_INTERVAL_DAYS} days']
+    if ids is not None:
+        where = f"WHERE equipment_id IN ({','.join('?' * len(ids))})"
+        params.extend(ids)
+
     # If no history exists, we might normally clear it, but for this app 
     # we assume initial data is sufficient or manual intervention.
+    # Units whose dates are already correct are left untouched.
+    if not SUPPORTS_UPDATE_FROM:
+        return _recalculate_status_correlated(conn, where, params)
+    cursor = conn.execute(f'''
+        UPDATE equipment
+        SET last_maintenance_date = latest.last_date,
+            next_maintenance_date = latest.next_date
+        FROM (
+            SELECT equipment_id,
+                   MAX(maintenance_date) AS last_date,
+                   date(MAX(maintenance_date), ?) AS next_date
+            FROM maintenance_history
+            {where}
+            GROUP BY equipment_id
+        ) AS latest
+        WHERE equipment.id = latest.equipment_id
+          AND (equipment.last_maintenance_date IS NOT latest.last_date
+               OR equipment.next_maintenance_date IS NOT latest.next_date)
+    ''', params)
+    return cursor.rowcount
+
+_LATEST_DATE = '(SELECT MAX(h.maintenance_date) FROM maintenance_history h WHERE h.equipment_id = equipment.id)'
+
+def _recalculate_status_correlated(conn, where, params):
+    # Same result as the UPDATE ... FROM above; each MAX() is an index seek
+    interval, ids = params[0], params[1:]
+    cursor = conn.execute(f'''
+        UPDATE equipment
+        SET last_maintenance_date = {_LATEST_DATE},
+            next_maintenance_date = date({_LATEST_DATE}, ?)
+        WHERE id IN (SELECT equipment_id FROM maintenance_history {where})
+          AND (last_maintenance_date IS NOT {_LATEST_DATE}
+               OR next_maintenance_date IS NOT date({_LATEST_DATE}, ?))
+    ''', [interval, *ids, interval])
+    return cursor.rowcount
+
+# -----------------------------------------------------------------------------
+# Change notification
+# -----------------------------------------------------------------------------
+# Callbacks run on the thread that committed the write, so they should only
+# mark state stale rather than touch the UI.
+_change_listeners = []
+
+def add_change_listener(callback):
+    _change_listeners.append(callback)
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def notify_data_changed(dates=None):
+    """
+    Called after every committed write to equipment or maintenance_history.
+    dates lists the maintenance dates touched (None when unknown), so
+    date-keyed caches can invalidate selectively.
+    """
+    for callback in list(_change_listeners):
+        callback(dates)
+
+def fetch_data_version():
+    """
+    Returns PRAGMA data_version for this thread's connection. The value only
+    changes when another connection (e.g. another operator) commits, and
+    reading it does not touch the database pages, so it is cheap to poll.
+    """
+    return get_connection().execute('PRAGMA data_version').fetchone()[0]
 
 def add_maintenance_history(equipment_id, date_str):
     with get_connection() as conn:
@@ -118,6 +462,30 @@ def add_maintenance_history(equipment_id, date_str):
         ''', (equipment_id, date_str))
         calculate_equipment_status(conn, equipment_id)
         conn.commit()
+    notify_data_changed([date_str])
+
+def record_maintenance(equipment_id, date_str):
+    """
+    Records a completed maintenance from the dashboard: the unit's dates are
+    set from date_str and the history row is added.
+    """
+    next_date = (date.fromisoformat(date_str) + timedelta(days=MAINTENANCE_INTERVAL_DAYS)).isoformat()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE equipment 
+            SET last_maintenance_date = ?, 
+                next_maintenance_date = ?
+            WHERE id = ?
+        ''', (date_str, next_date, equipment_id))
+        
+        # Re-recording the same unit on the same day is a no-op
+        cursor.execute('''
+            INSERT OR IGNORE INTO maintenance_history (equipment_id, maintenance_date)
+            VALUES (?, ?)
+        ''', (equipment_id, date_str))
+        conn.commit()
+    notify_data_changed([date_str])
 
 def update_maintenance_history(old_id, new_id, date_str):
     with get_connection() as conn:
@@ -135,9 +503,9 @@ def update_maintenance_history(old_id, new_id, date_str):
         ''', (new_id, old_id, date_str))
         
         # 2. Recalculate for both old (it lost a record) and new (it gained one)
-        calculate_equipment_status(conn, old_id)
-        calculate_equipment_status(conn, new_id)
+        recalculate_equipment_status(conn, [old_id, new_id])
         conn.commit()
+    notify_data_changed([date_str])
 
 def delete_maintenance_history(equipment_id, date_str):
     with get_connection() as conn:
@@ -148,3 +516,131 @@ def delete_maintenance_history(equipment_id, date_str):
         ''', (equipment_id, date_str))
         calculate_equipment_status(conn, equipment_id)
         conn.commit()
+    notify_data_changed([date_str])
+
+# -----------------------------------------------------------------------------
+# History queries
+# -----------------------------------------------------------------------------
+def _day(date_str):
+    return date.fromisoformat(date_str).toordinal()
+
+def fetch_maintenance_range(start, end):
+    """
+    Returns (type, equipment_id, maintenance_date, record id) rows for
+    start <= date < end, ordered as the calendar lists them.
+    """
+    conn = get_connection()
+    return conn.execute('''
+        SELECT e.type, m.equipment_id, m.maintenance_date, m.id
+        FROM maintenance_history m
+        JOIN equipment e ON m.equipment_id = e.id
+        WHERE m.maintenance_day >= ? AND m.maintenance_day < ?
+        ORDER BY m.maintenance_day, e.type DESC, m.equipment_id
+    ''', (_day(start), _day(end))).fetchall()
+
+def fetch_first_maintenance_day(eq_type):
+    """Day ordinal of the earliest maintenance recorded for a type, or None."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT MIN(m.maintenance_day)
+        FROM maintenance_history m
+        JOIN equipment e ON m.equipment_id = e.id
+        WHERE e.type = ?
+    ''', (eq_type,)).fetchone()[0]
+
+def fetch_history_events(eq_type, start, end):
+    """Returns (equipment_id, day ordinal) for day ordinals start..end, ordered by day."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT m.equipment_id, m.maintenance_day
+        FROM maintenance_history m
+        JOIN equipment e ON m.equipment_id = e.id
+        WHERE e.type = ? AND m.maintenance_day >= ? AND m.maintenance_day <= ?
+        ORDER BY m.maintenance_day
+    ''', (eq_type, start, end)).fetchall()
+
+def fetch_last_service_before(eq_type, before):
+    """Returns (equipment_id, latest day ordinal < before) per unit of a type."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT m.equipment_id, MAX(m.maintenance_day)
+        FROM maintenance_history m
+        JOIN equipment e ON m.equipment_id = e.id
+        WHERE e.type = ? AND m.maintenance_day < ?
+        GROUP BY m.equipment_id
+    ''', (eq_type, before)).fetchall()
+
+# -----------------------------------------------------------------------------
+# Columnar loads (see core.py)
+# -----------------------------------------------------------------------------
+def fetch_equipment_days():
+    """Returns (id, type, last_maintenance_date, last day ordinal) rows ordered by id."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT id, type, last_maintenance_date, last_maintenance_day
+        FROM equipment
+        WHERE last_maintenance_day IS NOT NULL
+        ORDER BY id
+    ''').fetchall()
+
+def fetch_undated_equipment():
+    """
+    Returns (id, type, last_maintenance_date) of units whose last date is
+    not a readable date. fetch_equipment_days() cannot place them, so
+    callers report them rather than let them drop out of every view.
+    """
+    conn = get_connection()
+    return conn.execute('''
+        SELECT id, type, last_maintenance_date
+        FROM equipment
+        WHERE last_maintenance_day IS NULL
+        ORDER BY id
+    ''').fetchall()
+
+def fetch_history_days(eq_type=None):
+    """Returns (equipment_id, day ordinal) rows ordered by unit, then date."""
+    conn = get_connection()
+    where, params = ('WHERE e.type = ?', (eq_type,)) if eq_type is not None else ('', ())
+    return conn.execute(f'''
+        SELECT m.equipment_id, m.maintenance_day
+        FROM maintenance_history m
+        JOIN equipment e ON m.equipment_id = e.id
+        {where}
+        ORDER BY m.equipment_id, m.maintenance_date  -- same order; served by the unique index
+    ''', params).fetchall()
+
+# -----------------------------------------------------------------------------
+# Import checkpoints
+# -----------------------------------------------------------------------------
+def fetch_last_history_id(conn):
+    """Highest maintenance_history id; rows inserted afterwards have larger ids."""
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM maintenance_history").fetchone()[0]
+
+def fetch_units_added_since(conn, history_id):
+    """Equipment ids with history rows inserted after history_id (AUTOINCREMENT keeps ids rising)."""
+    return [row[0] for row in conn.execute(
+        "SELECT DISTINCT equipment_id FROM maintenance_history WHERE id > ?", (history_id,)
+    )]
+
+def fetch_import_checkpoint(source):
+    """Returns (last_rowid, row_hash, max_date) of a legacy source, or None."""
+    conn = get_connection()
+    return conn.execute('''
+        SELECT last_rowid, row_hash, max_date FROM import_checkpoints WHERE source = ?
+    ''', (source,)).fetchone()
+
+def delete_import_checkpoint(conn, source):
+    """Forgets a source's checkpoint as part of the caller's import transaction."""
+    conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+
+def save_import_checkpoint(conn, source, last_rowid, row_hash, max_date):
+    """Stores a source's checkpoint as part of the caller's import transaction."""
+    conn.execute('''
+        INSERT INTO import_checkpoints (source, last_rowid, row_hash, max_date, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (source) DO UPDATE SET
+            last_rowid = excluded.last_rowid,
+            row_hash = excluded.row_hash,
+            max_date = excluded.max_date,
+            updated_at = excluded.updated_at
+    ''', (source, last_rowid, row_hash, max_date))
@@ -1,5 +1,5 @@
 import tkinter as tk
-from ACSP.database import init_database
+from ACSP.database import init_database, close_connections
 from ACSP.ui.app import ACSPApp
 
 def main():
@@ -11,7 +11,10 @@ def main():
     # Start Application
     app = ACSPApp(root)
     
-    root.mainloop()
+    try:
+        root.mainloop()
+    finally:
+        close_connections()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,212 @@
+import heapq
+import threading
+from collections import OrderedDict
+from datetime import date
+from .core import FleetColumns
+from .database import add_change_listener, fetch_maintenance_range, MAINTENANCE_INTERVAL_DAYS
+
+class FleetSnapshot:
+    """
+    Immutable view of the equipment table as of one day, with rows
+    pre-partitioned by type and by (type, status) bucket.
+    Rows are (id, type, last_maintenance_date, days_passed, days_remaining, status);
+    undated holds (id, type, date text) of units with no readable last date.
+    """
+    def __init__(self, rows, today, undated=()):
+        self.today = today
+        self.rows = rows
+        self.undated = list(undated)
+        self.by_type = {}
+        self.by_type_status = {}
+        for row in rows:
+            eq_type, status = row[1], row[5]
+            self.by_type.setdefault(eq_type, []).append(row)
+            self.by_type_status.setdefault((eq_type, status), []).append(row)
+
+    def select(self, eq_type, status=None):
+        """Rows of one type (and optionally one status bucket), ordered by id."""
+        if status is None:
+            return self.by_type.get(eq_type, [])
+        return self.by_type_status.get((eq_type, status), [])
+
+    def counts(self, eq_type):
+        """Returns (total, overdue, warning) for one type."""
+        return (
+            len(self.by_type.get(eq_type, [])),
+            len(self.by_type_status.get((eq_type, 'overdue'), [])),
+            len(self.by_type_status.get((eq_type, 'warning'), [])),
+        )
+
+    def shifted(self, today, new_status):
+        """
+        Returns this snapshot moved forward to another day without touching
+        SQLite. new_status maps the ids whose bucket changed to that bucket;
+        every other row keeps its status.
+        """
+        delta = (today - self.today).days
+        rows = [
+            (eq_id, eq_type, last_date, days_passed + delta, days_remaining - delta,
+             new_status.get(eq_id, status))
+            for eq_id, eq_type, last_date, days_passed, days_remaining, status in self.rows
+        ]
+        return FleetSnapshot(rows, today, self.undated)
+
+
+class FleetModel:
+    """
+    Shared, lazily loaded fleet snapshot. It is read once from SQLite and
+    then served from memory until a write in database.py invalidates it.
+
+    Day changes are handled in memory: a min-heap holds each unit's next
+    status transition (Good->Warning, Warning->OVERDUE) as a day ordinal, so
+    rolling over only reclassifies the units whose transition is due.
+    """
+    def __init__(self):
+        self._snapshot = None
+        self._transitions = []
+        self._generation = 0
+        self._lock = threading.Lock()
+        add_change_listener(self.invalidate)
+
+    def invalidate(self, dates=None):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+            self._transitions = []
+
+    @property
+    def snapshot(self):
+        """The cached snapshot as of today, or None if it must be (re)loaded."""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return None
+            today = date.today()
+            if snapshot.today != today:
+                snapshot = self._advance(snapshot, today)
+            return snapshot
+
+    def next_transition(self):
+        """Day on which the next unit changes status, or None."""
+        with self._lock:
+            if not self._transitions:
+                return None
+            return date.fromordinal(self._transitions[0][0])
+
+    def load(self):
+        """
+        Returns the current snapshot, querying SQLite only when the cache
+        is stale. Intended to run on the database worker thread.
+        """
+        snapshot = self.snapshot
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            generation = self._generation
+        today = date.today()
+        status = FleetColumns.load().status(today)
+        snapshot = FleetSnapshot(status.rows(), today, status.fleet.undated)
+        transitions = status.transitions()
+        heapq.heapify(transitions)
+        with self._lock:
+            # A write that landed while we were reading makes this stale
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._transitions = transitions
+        return snapshot
+
+    def _advance(self, snapshot, today):
+        # Caller holds the lock
+        due = today.toordinal()
+        new_status = {}
+        while self._transitions and self._transitions[0][0] <= due:
+            _, eq_id, status, last_ordinal = heapq.heappop(self._transitions)
+            new_status[eq_id] = status
+            if status == 'warning':
+                heapq.heappush(self._transitions, (last_ordinal + MAINTENANCE_INTERVAL_DAYS + 1, eq_id, 'overdue', last_ordinal))
+
+        self._snapshot = snapshot.shifted(today, new_status)
+        return self._snapshot
+
+class MonthData:
+    """Maintenance history of one calendar month."""
+    def __init__(self, year, month, rows):
+        self.year = year
+        self.month = month
+        # date -> [(type, equipment_id, date, record id)], for the day list
+        self.days = {}
+        # date -> {'QC': ['id', ...], 'ARMGC': [...]}, for drawing the cells
+        self.equipment_map = {}
+        for row in rows:
+            eq_type, eq_id, date_str, _ = row
+            self.days.setdefault(date_str, []).append(row)
+            types = self.equipment_map.setdefault(date_str, {'QC': [], 'ARMGC': []})
+            if eq_type in types:
+                types[eq_type].append(str(eq_id))
+
+
+class MonthCache:
+    """
+    Bounded LRU cache of MonthData keyed by (year, month). A write only
+    drops the months it touched; load() runs on the database worker, which
+    also performs the writes, so a load can never store pre-write data.
+    """
+    def __init__(self, max_months=12):
+        self.max_months = max_months
+        self._months = OrderedDict()
+        self._lock = threading.Lock()
+        add_change_listener(self.invalidate)
+
+    def get(self, year, month):
+        """Cached month (marked most recently used), or None."""
+        with self._lock:
+            data = self._months.get((year, month))
+            if data is not None:
+                self._months.move_to_end((year, month))
+            return data
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._months
+
+    def load(self, year, month):
+        """Returns the month, querying exactly its date range on a miss."""
+        data = self.get(year, month)
+        if data is not None:
+            return data
+        
+        start, end = month_range(year, month)
+        data = MonthData(year, month, fetch_maintenance_range(start, end))
+        with self._lock:
+            self._months[(year, month)] = data
+            while len(self._months) > self.max_months:
+                self._months.popitem(last=False)
+        return data
+
+    def invalidate(self, dates=None):
+        if dates is None:
+            self.clear()
+            return
+        with self._lock:
+            for date_str in dates:
+                self._months.pop(month_of(date_str), None)
+
+    def clear(self):
+        with self._lock:
+            self._months.clear()
+
+def month_of(date_str):
+    """Returns (year, month) of a 'YYYY-MM-DD' string."""
+    return int(date_str[:4]), int(date_str[5:7])
+
+def month_range(year, month):
+    """Returns ('YYYY-MM-01', first day of the next month) for range queries."""
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return f"{year}-{month:02d}-01", f"{next_year}-{next_month:02d}-01"
+
+def adjacent_months(year, month):
+    """Returns the (year, month) before and after the given month."""
+    prev = (year - 1, 12) if month == 1 else (year, month - 1)
+    following = (year + 1, 1) if month == 12 else (year, month + 1)
+    return prev, following
@@ -0,0 +1,171 @@
+import heapq
+import time
+from datetime import date
+from .core import FleetColumns
+from .database import MAINTENANCE_INTERVAL_DAYS, WARNING_DAYS
+
+# Units each crew can service per day, per equipment type
+DEFAULT_CREW_CAPACITY = {'ARMGC': 1, 'QC': 1}
+PLAN_WEEKS = 8
+# Upper bound on the local-search phase, on top of the greedy pass
+IMPROVE_SECONDS = 0.5
+IMPROVE_PASSES = 4
+
+class MaintenancePlan:
+    """
+    Planned services from start to end (day ordinals, inclusive).
+    services are (day ordinal, type, id) sorted by day; overdue_days and
+    unplanned_overdue_days give the overdue unit-days per type with and
+    without the plan.
+    """
+    def __init__(self, start, end, services, overdue_days, unplanned_overdue_days):
+        self.start = start
+        self.end = end
+        self.services = services
+        self.overdue_days = overdue_days
+        self.unplanned_overdue_days = unplanned_overdue_days
+
+    def by_date(self):
+        """date -> {'QC': ['id', ...], 'ARMGC': [...]}, the calendar's equipment_map shape."""
+        plan_map = {}
+        for day, eq_type, eq_id in self.services:
+            types = plan_map.setdefault(date.fromordinal(day).isoformat(), {'QC': [], 'ARMGC': []})
+            types.setdefault(eq_type, []).append(str(eq_id))
+        return plan_map
+
+
+def plan_maintenance(fleet=None, start=None, weeks=PLAN_WEEKS, capacity=None, improve=True):
+    """
+    Plans services for the next weeks so that overdue unit-days are as few
+    as the crews' daily capacity allows. Types are planned independently.
+
+    A greedy pass walks the days in order and gives each day's capacity to
+    the units closest to (or furthest past) their due day: those in the
+    Warning window, plus as many earlier ones as the following days could
+    not fit in on time. A local search then pulls late services forward
+    into earlier days with spare capacity when that lowers the unit's
+    overdue days. Intended to run on the database worker thread.
+    """
+    fleet = fleet if fleet is not None else FleetColumns.load()
+    start = (start or date.today()).toordinal()
+    end = start + weeks * 7 - 1
+    capacity = capacity or DEFAULT_CREW_CAPACITY
+    deadline = time.perf_counter() + IMPROVE_SECONDS
+
+    last_by_type = {}
+    for eq_id, eq_type, last in fleet.records():
+        last_by_type.setdefault(eq_type, {})[eq_id] = last
+
+    services = []
+    overdue_days = {}
+    unplanned_overdue_days = {}
+    for eq_type, last in last_by_type.items():
+        crew = capacity.get(eq_type, 0)
+        schedule, load = _greedy(last, start, end, crew)
+        if improve:
+            _improve(last, schedule, load, start, end, crew, deadline)
+        overdue_days[eq_type] = sum(_overdue_days(last[u], days, start, end) for u, days in schedule.items())
+        unplanned_overdue_days[eq_type] = sum(_overdue_days(l, [], start, end) for l in last.values())
+        services.extend((day, eq_type, eq_id) for eq_id, days in schedule.items() for day in days)
+
+    services.sort()
+    return MaintenancePlan(start, end, services, overdue_days, unplanned_overdue_days)
+
+def _overdue_days(last, days, start, end):
+    # Days in start..end on which the unit is overdue, given its planned
+    # service days (sorted). A unit counts as serviced on its service day.
+    total = 0
+    segment_start = start
+    for service in days + [end + 1]:
+        first_overdue = max(segment_start, last + MAINTENANCE_INTERVAL_DAYS + 1)
+        if first_overdue < service:
+            total += service - first_overdue
+        last = segment_start = service
+    return total
+
+def _greedy(last, start, end, crew):
+    # Heap of (due day, unit); due is the last day a unit is still on time
+    heap = [(day + MAINTENANCE_INTERVAL_DAYS, unit) for unit, day in last.items()]
+    heapq.heapify(heap)
+    schedule = {unit: [] for unit in last}
+    load = [0] * (end - start + 1)
+    if crew <= 0:
+        return schedule, load
+
+    for day in range(start, end + 1):
+        need = units_needed_today(heap, day, crew)
+        used = 0
+        # Units already in Warning (or overdue) are worth a slot; earlier
+        # units only when later days could not fit everyone on time
+        while used < crew and heap and (heap[0][0] - day < WARNING_DAYS or used < need):
+            _, unit = heapq.heappop(heap)
+            schedule[unit].append(day)
+            heapq.heappush(heap, (day + MAINTENANCE_INTERVAL_DAYS, unit))
+            used += 1
+        load[day - start] = used
+    return schedule, load
+
+def units_needed_today(heap, day, crew):
+    """
+    How many units must be served today so that every unit in heap (of
+    (due day, unit)) can still be served on time with crew slots per day.
+    """
+    # The j-th unit by due day (0-based) is only on time if the days after
+    # today up to its due day have j + 1 free slots; the largest shortfall
+    # has to be served today.
+    need = 0
+    pending = len(heap)
+    for j, (due, _) in enumerate(sorted(heap)):
+        slots = crew * (due - day)
+        if slots >= pending:
+            break  # No later unit can be short of slots either
+        need = max(need, j + 1 - slots)
+    return need
+
+def _improve(last, schedule, load, start, end, crew, deadline):
+    # Moves one late service at a time to the latest earlier day with spare
+    # capacity, keeping the move only if the unit's overdue days drop.
+    # A unit's cost depends only on its own days, so moves are evaluated
+    # per unit; capacity is what couples them.
+    for _ in range(IMPROVE_PASSES):
+        improved = False
+        for unit, days in schedule.items():
+            if time.perf_counter() > deadline:
+                return
+            cost = _overdue_days(last[unit], days, start, end)
+            if not cost:
+                continue
+            previous = last[unit]
+            for k, service in enumerate(days):
+                due = previous + MAINTENANCE_INTERVAL_DAYS
+                if service > due:
+                    moved = _pull_forward(last[unit], days, k, max(previous + 1, start), due, load, start, end, crew, cost)
+                    if moved is not None:
+                        load[service - start] -= 1
+                        load[moved - start] += 1
+                        days[k] = moved
+                        cost = _overdue_days(last[unit], days, start, end)
+                        improved = True
+                previous = days[k]
+        if not improved:
+            return
+
+def _pull_forward(last, days, k, earliest, due, load, start, end, crew, cost):
+    # Latest free day before days[k]; the latest free day that is still on
+    # time is tried as well. Returns the better day if it beats cost.
+    candidates = []
+    for day in range(days[k] - 1, earliest - 1, -1):
+        if load[day - start] < crew:
+            if not candidates:
+                candidates.append(day)
+            if day <= due:
+                if candidates[0] != day:
+                    candidates.append(day)
+                break
+    best = None
+    for day in candidates:
+        trial = days[:k] + [day] + days[k + 1:]
+        trial_cost = _overdue_days(last, trial, start, end)
+        if trial_cost < cost:
+            best, cost = day, trial_cost
+    return best
@@ -0,0 +1,123 @@
+import heapq
+import random
+import statistics
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from .core import FleetColumns
+from .database import MAINTENANCE_INTERVAL_DAYS, WARNING_DAYS
+from .planner import DEFAULT_CREW_CAPACITY, units_needed_today
+
+SIMULATION_DAYS = 365
+DEFAULT_REPLICAS = 200
+DEFAULT_SEED = 20240601
+# Replicas per pool task; keeps pickling the fleet cheap relative to the work
+REPLICAS_PER_TASK = 10
+
+class Scenario(namedtuple('Scenario', 'name capacity interval slip')):
+    """
+    One what-if setting: crew capacity per type per day, the maintenance
+    interval (status thresholds and planning both use it) and the chance
+    that a planned service slips to a later day.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def baseline(cls, name='current', capacity=None, interval=MAINTENANCE_INTERVAL_DAYS, slip=0.1):
+        return cls(name, dict(capacity or DEFAULT_CREW_CAPACITY), interval, slip)
+
+
+class ScenarioResult(namedtuple('ScenarioResult', 'scenario rates')):
+    """Mean daily overdue rate (%) of every replica of one scenario."""
+    __slots__ = ()
+
+    @property
+    def mean(self):
+        return statistics.fmean(self.rates)
+
+    def percentile(self, q):
+        if len(self.rates) == 1:
+            return self.rates[0]
+        return statistics.quantiles(self.rates, n=100, method='inclusive')[q - 1]
+
+
+def run_scenarios(scenarios, days=SIMULATION_DAYS, replicas=DEFAULT_REPLICAS, seed=DEFAULT_SEED,
+                  workers=None, fleet=None, start=None):
+    """
+    Simulates every scenario replicas times from the current fleet state
+    across a process pool (workers=None uses every CPU, 1 runs inline) and
+    returns one ScenarioResult per scenario.
+
+    Replicas use common random numbers: replica r of every scenario draws
+    from generators seeded by (seed, r, type), so differences between
+    scenarios come from their settings rather than from sampling noise,
+    identical scenarios give identical results, and nothing depends on
+    the number of workers or the order in which they finish.
+    """
+    if replicas < 1:
+        raise ValueError(f"replicas must be at least 1, got {replicas}")
+    fleet = fleet if fleet is not None else FleetColumns.load()
+    start = (start or date.today()).toordinal()
+    units = [(eq_type, last) for _, eq_type, last in fleet.records()]
+
+    tasks = [
+        (scenario, units, start, days, seed, list(range(first, min(first + REPLICAS_PER_TASK, replicas))))
+        for scenario in scenarios
+        for first in range(0, replicas, REPLICAS_PER_TASK)
+    ]
+    # Task i * batches_per_scenario + j belongs to scenarios[i]
+    batches_per_scenario = len(range(0, replicas, REPLICAS_PER_TASK))
+    if workers == 1:
+        batches = list(map(_run_batch, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(_run_batch, tasks))
+
+    # Keyed by position, not name, so two scenarios never pool their replicas
+    rates = [[] for _ in scenarios]
+    for i, batch in enumerate(batches):
+        rates[i // batches_per_scenario].extend(batch)
+    return [ScenarioResult(scenario, scenario_rates) for scenario, scenario_rates in zip(scenarios, rates)]
+
+def _run_batch(task):
+    # Runs in a pool process; must stay a module-level function to pickle
+    scenario, units, start, days, seed, replicas = task
+    return [
+        simulate(scenario, units, start, days, f'{seed}:{replica}')
+        for replica in replicas
+    ]
+
+def simulate(scenario, units, start, days, stream):
+    """
+    Replays days of operation for (type, last service ordinal) units and
+    returns the mean daily overdue rate in percent. Crews follow the
+    planner's greedy policy; each planned service slips with probability
+    scenario.slip, in which case the slot is lost and the unit waits.
+    Each type draws from its own generator seeded by (stream, type), so
+    changing one type's crew leaves the other types' draws untouched.
+    """
+    by_type = {}
+    for eq_type, last in units:
+        by_type.setdefault(eq_type, []).append(last)
+    if not units:
+        return 0.0
+
+    interval = scenario.interval
+    overdue_days = 0
+    for eq_type, lasts in by_type.items():
+        crew = scenario.capacity.get(eq_type, 0)
+        rng = random.Random(f'{stream}:{eq_type}')
+        # (due day, unit) where due is the last day the unit is on time
+        heap = [(last + interval, unit) for unit, last in enumerate(lasts)]
+        heapq.heapify(heap)
+        for day in range(start, start + days):
+            need = units_needed_today(heap, day, crew) if crew else 0
+            used = 0
+            while used < crew and heap and (heap[0][0] - day < WARNING_DAYS or used < need):
+                used += 1
+                if rng.random() < scenario.slip:
+                    continue  # The crew lost this slot; the unit stays queued
+                _, unit = heapq.heappop(heap)
+                heapq.heappush(heap, (day + interval, unit))
+            overdue_days += sum(1 for due, _ in heap if due < day)
+    return overdue_days / (len(units) * days) * 100
@@ -1,82 +1,139 @@
+import argparse
+import hashlib
 import sqlite3
 import os
 import sys
-from datetime import datetime
+import time
 
 # Add root to path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from ACSP.database import get_connection, calculate_equipment_status
+from ACSP.database import (
+    get_connection, init_database, recalculate_equipment_status,
+    fetch_import_checkpoint, save_import_checkpoint, delete_import_checkpoint,
+    fetch_last_history_id, fetch_units_added_since
+)
+from ACSP.core import print_summary
+from ACSP.tools.legacy_source import (
+    LEGACY_DB_PATH, open_source, fetch_known_units, add_unknown_units_argument,
+    HistoryFilter, print_unknown_units
+)
 
-# Legacy Path
-# Note: Using raw string for Windows path
-LEGACY_DB_PATH = r'\\172.16.3.237\Technical\주장비 PMS 관리 List\PMS_Manager_v2.0\pms.db'
+# Source rows fetched (and inserted) per round trip
+CHUNK_SIZE = 5000
 
-def import_data():
-    print(f"Checking access to: {LEGACY_DB_PATH}")
-    if not os.path.exists(LEGACY_DB_PATH):
+def checkpoint_key(source_path):
+    return os.path.normcase(os.path.abspath(source_path))
+
+def row_hash(equipment_id, maintenance_date):
+    return hashlib.sha1(f"{equipment_id}|{maintenance_date}".encode()).hexdigest()
+
+def resume_point(src_conn, source_path):
+    """
+    (legacy rowid, max date) the last import stopped at, or (0, None) to
+    read everything.
+    The checkpoint is only trusted while the row it points at is unchanged;
+    edits further back are not detected, which is what --full is for.
+    """
+    checkpoint = fetch_import_checkpoint(checkpoint_key(source_path))
+    if checkpoint is None:
+        return 0, None
+    last_rowid, saved_hash, max_date = checkpoint
+    boundary = src_conn.execute(
+        "SELECT equipment_id, maintenance_date FROM maintenance_history WHERE rowid = ?",
+        (last_rowid,)
+    ).fetchone()
+    if boundary is None or row_hash(*boundary) != saved_hash:
+        print("Checkpoint no longer matches the legacy DB; importing everything.")
+        return 0, None
+    print(f"Resuming after legacy row {last_rowid} (history up to {max_date}).")
+    return last_rowid, max_date
+
+def import_data(source_path=LEGACY_DB_PATH, full=False, use_snapshot=False, immutable=False, include_unknown=False):
+    print(f"Checking access to: {source_path}")
+    if not os.path.exists(source_path):
         print("Error: Cannot find legacy DB file. Check network connection or path.")
         return
 
     print("Connecting to legacy DB...")
+    read_count = 0
     imported_count = 0
-    skipped_count = 0
-    
+
     try:
         # Connect to Source
-        src_conn = sqlite3.connect(LEGACY_DB_PATH)
+        src_conn = open_source(source_path, use_snapshot, immutable)
         src_cursor = src_conn.cursor()
-        
-        # Connect to Dest
+
+        # Connect to Dest (the unique (equipment_id, maintenance_date) index
+        # the upsert relies on comes with the schema migrations)
+        init_database()
         dest_conn = get_connection()
-        dest_cursor = dest_conn.cursor()
-        
-        # 1. Fetch History
-        print("Fetching maintenance history...")
+
+        # 1. Stream history into the destination
+        print("Importing maintenance history...")
         try:
-            src_cursor.execute("SELECT equipment_id, maintenance_date FROM maintenance_history")
-            rows = src_cursor.fetchall()
+            start_rowid, max_date = (0, None) if full else resume_point(src_conn, source_path)
+            src_cursor.execute(
+                "SELECT rowid, equipment_id, maintenance_date FROM maintenance_history WHERE rowid > ? ORDER BY rowid",
+                (start_rowid,)
+            )
         except sqlite3.OperationalError as e:
             print(f"Error reading source table: {e}")
             return
-            
-        print(f"Found {len(rows)} records. Importing...")
-        
-        affected_ids = set()
-        
-        for eq_id, date_str in rows:
-            # Check if exists
-            dest_cursor.execute(
-                "SELECT id FROM maintenance_history WHERE equipment_id = ? AND maintenance_date = ?",
-                (eq_id, date_str)
-            )
-            if dest_cursor.fetchone():
-                skipped_count += 1
-                continue
-            
-            # Insert
-            dest_cursor.execute(
-                "INSERT INTO maintenance_history (equipment_id, maintenance_date) VALUES (?, ?)",
-                (eq_id, date_str)
-            )
-            imported_count += 1
-            affected_ids.add(eq_id)
-            
-        dest_conn.commit()
-        
-        # 2. Recalculate Status
+
+        started = time.perf_counter()
+        first_new_id = fetch_last_history_id(dest_conn)
+        history = HistoryFilter(fetch_known_units(dest_conn, include_unknown))
+        while True:
+            rows = src_cursor.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            # Same (int, ISO date) form as every other writer, so the unique
+            # key catches '2024-3-7' vs '2024-03-07'
+            normalised = history.filter(rows)
+            # Duplicates are skipped by the unique key instead of a SELECT per row
+            cursor = dest_conn.executemany('''
+                INSERT INTO maintenance_history (equipment_id, maintenance_date)
+                VALUES (?, ?)
+                ON CONFLICT (equipment_id, maintenance_date) DO NOTHING
+            ''', normalised)
+            chunk_max = max((date_str for _, date_str in normalised), default=None)
+            if chunk_max and (max_date is None or chunk_max > max_date):
+                max_date = chunk_max
+            read_count += len(rows)
+            imported_count += cursor.rowcount
+            elapsed = time.perf_counter() - started
+            print(f"\r  {read_count} read, {imported_count} new ({read_count / elapsed:.0f} rows/s)", end='', flush=True)
+        print()
+
+        # 2. Recalculate Status of the units that got new history, in one
+        # set-based pass; only units whose dates actually changed are written
         print("Recalculating equipment status...")
-        for eq_id in affected_ids:
-            calculate_equipment_status(dest_conn, eq_id)
-            
+        affected_ids = fetch_units_added_since(dest_conn, first_new_id) if imported_count else []
+        updated_count = recalculate_equipment_status(dest_conn, affected_ids) if affected_ids else 0
+
+        # The checkpoint commits together with the rows it covers
+        if history.checkpoint_row is not None:
+            rowid, eq_id, date_str = history.checkpoint_row
+            save_import_checkpoint(dest_conn, checkpoint_key(source_path), rowid, row_hash(eq_id, date_str), max_date)
+        elif history.held_back and full:
+            # An older checkpoint may lie past the skipped rows
+            delete_import_checkpoint(dest_conn, checkpoint_key(source_path))
+
         dest_conn.commit()
-        
+        elapsed = time.perf_counter() - started
+
         print("-" * 30)
-        print(f"Import Complete.")
+        print("Import Complete.")
         print(f"Imported: {imported_count}")
-        print(f"Skipped (Duplicate): {skipped_count}")
+        print(f"Skipped (Duplicate): {read_count - history.unreadable - history.unknown - imported_count}")
+        print(f"Skipped (Unreadable): {history.unreadable}")
+        print_unknown_units(history.unknown_units, history.unknown)
+        print(f"Equipment updated: {updated_count}")
+        print(f"Time: {elapsed:.1f}s ({read_count / elapsed if elapsed else 0:.0f} rows/s)")
         print("-" * 30)
-        
+        print_summary()
+
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
     finally:
@@ -86,4 +143,12 @@ def import_data():
             dest_conn.close()
 
 if __name__ == "__main__":
-    import_data()
+    parser = argparse.ArgumentParser(description="Import maintenance history from the legacy pms.db.")
+    parser.add_argument('source', nargs='?', default=LEGACY_DB_PATH, help="legacy DB path")
+    parser.add_argument('--full', action='store_true', help="ignore the checkpoint and re-read all rows")
+    parser.add_argument('--snapshot', action='store_true', help="read from a local copy of the legacy DB")
+    add_unknown_units_argument(parser)
+    parser.add_argument('--immutable', action='store_true',
+                        help="read in place without locking (only while the legacy app is not writing)")
+    args = parser.parse_args()
+    import_data(args.source, args.full, args.snapshot, args.immutable, args.include_unknown)
@@ -0,0 +1,225 @@
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import freeze_support
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from ACSP.database import (
+    get_connection, init_database, recalculate_equipment_status,
+    fetch_import_checkpoint, save_import_checkpoint, delete_import_checkpoint,
+    fetch_last_history_id, fetch_units_added_since
+)
+from ACSP.core import print_summary
+from ACSP.tools.import_legacy import CHUNK_SIZE, checkpoint_key, row_hash
+from ACSP.tools.legacy_source import (
+    open_source, fetch_known_units, add_unknown_units_argument, HistoryFilter, print_unknown_units
+)
+
+# What one pool process hands back for one legacy DB
+SourceRows = namedtuple(
+    'SourceRows',
+    'path read rows types checkpoint_row held_back max_date unreadable unknown unknown_units resumed error seconds'
+)
+
+def _failed(path, error, seconds):
+    return SourceRows(path, 0, set(), {}, None, False, None, 0, 0, set(), False, error, seconds)
+
+def read_source(path, checkpoint, use_snapshot, immutable=False, known_units=None):
+    """
+    Reads and normalises one legacy DB (runs in a pool process). History
+    past the checkpoint (last_rowid, row_hash) goes through HistoryFilter
+    and is returned as a set of (equipment_id, date); the whole equipment
+    table as {id: type}.
+    """
+    started = time.perf_counter()
+    try:
+        conn = open_source(path, use_snapshot, immutable)
+    except Exception as e:
+        return _failed(path, str(e), 0.0)
+
+    try:
+        start_rowid = 0
+        if checkpoint is not None:
+            last_rowid, saved_hash = checkpoint
+            boundary = conn.execute(
+                "SELECT equipment_id, maintenance_date FROM maintenance_history WHERE rowid = ?",
+                (last_rowid,)
+            ).fetchone()
+            if boundary is not None and row_hash(*boundary) == saved_hash:
+                start_rowid = last_rowid
+
+        columns = [info[1] for info in conn.execute("PRAGMA table_info(equipment)")]
+        type_column = 'type' if 'type' in columns else 'NULL'
+        types = dict(conn.execute(f"SELECT id, {type_column} FROM equipment"))
+
+        cursor = conn.execute(
+            "SELECT rowid, equipment_id, maintenance_date FROM maintenance_history WHERE rowid > ? ORDER BY rowid",
+            (start_rowid,)
+        )
+        history = HistoryFilter(known_units)
+        rows = set()
+        read = 0
+        while True:
+            chunk = cursor.fetchmany(CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            rows.update(history.filter(chunk))
+        max_date = max((d for _, d in rows), default=None)
+        return SourceRows(path, read, rows, types, history.checkpoint_row, history.held_back, max_date,
+                          history.unreadable, history.unknown, history.unknown_units, start_rowid > 0, None,
+                          time.perf_counter() - started)
+    except Exception as e:
+        return _failed(path, str(e), time.perf_counter() - started)
+    finally:
+        conn.close()
+
+def find_conflicts(results, known_types):
+    """Unit ids whose type differs between sources (or from acsp.db): {id: {source: type}}."""
+    seen = {}
+    for result in results:
+        for eq_id, eq_type in result.types.items():
+            if eq_type is not None:
+                seen.setdefault(eq_id, {})[result.path] = eq_type
+    conflicts = {}
+    for eq_id, by_source in seen.items():
+        types = set(by_source.values())
+        if eq_id in known_types:
+            types.add(known_types[eq_id])
+        if len(types) > 1:
+            if eq_id in known_types:
+                by_source['acsp.db'] = known_types[eq_id]
+            conflicts[eq_id] = by_source
+    return conflicts
+
+def import_sources(paths, full=False, use_snapshot=False, workers=None, include_unknown=False, immutable=False):
+    # The same file given twice (or under two spellings) is read once
+    unique = {}
+    for path in paths:
+        unique.setdefault(checkpoint_key(path), path)
+    paths = list(unique.values())
+    missing = [path for path in paths if not os.path.exists(path)]
+    for path in missing:
+        print(f"Error: Cannot find legacy DB file: {path}")
+    paths = [path for path in paths if path not in missing]
+    if not paths:
+        return
+
+    try:
+        init_database()
+        dest_conn = get_connection()
+        known_types = dict(dest_conn.execute("SELECT id, type FROM equipment"))
+        known_units = fetch_known_units(dest_conn, include_unknown)
+        checkpoints = {}
+        if not full:
+            for path in paths:
+                checkpoint = fetch_import_checkpoint(checkpoint_key(path))
+                if checkpoint is not None:
+                    checkpoints[path] = checkpoint
+
+        # 1. Read and normalise every source in its own process, so the
+        # slowest source (not the sum of all of them) sets the pace
+        print(f"Reading {len(paths)} legacy sources...")
+        started = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(max_workers=workers or min(len(paths), os.cpu_count() or 1)) as executor:
+            futures = [
+                executor.submit(read_source, path, checkpoints[path][:2] if path in checkpoints else None,
+                                use_snapshot, immutable, known_units)
+                for path in paths
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if result.error:
+                    print(f"  {result.path}: ERROR {result.error}")
+                else:
+                    resumed = " since checkpoint" if result.resumed else ""
+                    print(f"  {result.path}: {result.read} rows read{resumed}, {len(result.rows)} distinct, "
+                          f"{result.unreadable} unreadable ({result.seconds:.1f}s)")
+        read_seconds = time.perf_counter() - started
+        # Merge in the order given, so "first source wins" is predictable
+        results.sort(key=lambda r: paths.index(r.path))
+        ok = [r for r in results if not r.error]
+
+        # 2. De-duplicate across sources and check unit ids against each other
+        conflicts = find_conflicts(ok, known_types)
+        merged = set()
+        cross_duplicates = 0
+        for result in ok:
+            cross_duplicates += len(result.rows & merged)
+            merged |= result.rows
+        unknown_units = set().union(*(r.unknown_units for r in ok))
+        unknown_count = sum(r.unknown for r in ok)
+        unreadable_count = sum(r.unreadable for r in ok)
+
+        # 3. One writer transaction for all sources: history, status and
+        # checkpoints commit together or not at all
+        print("Merging into acsp.db...")
+        first_new_id = fetch_last_history_id(dest_conn)
+        cursor = dest_conn.executemany('''
+            INSERT INTO maintenance_history (equipment_id, maintenance_date)
+            VALUES (?, ?)
+            ON CONFLICT (equipment_id, maintenance_date) DO NOTHING
+        ''', sorted(merged))
+        imported_count = cursor.rowcount
+        # Only units that got new history; synced dates elsewhere stay as they are
+        affected_ids = fetch_units_added_since(dest_conn, first_new_id) if imported_count else []
+        updated_count = recalculate_equipment_status(dest_conn, affected_ids) if affected_ids else 0
+        # Each checkpoint stops before that source's first skipped unknown-unit row
+        for result in ok:
+            if result.checkpoint_row is None:
+                if result.held_back and full:
+                    # An older checkpoint may lie past the skipped rows
+                    delete_import_checkpoint(dest_conn, checkpoint_key(result.path))
+                continue
+            rowid, eq_id, date_str = result.checkpoint_row
+            previous = checkpoints[result.path][2] if result.resumed else None
+            max_date = max(filter(None, (result.max_date, previous)), default=None)
+            save_import_checkpoint(dest_conn, checkpoint_key(result.path), rowid, row_hash(eq_id, date_str), max_date)
+        dest_conn.commit()
+        elapsed = time.perf_counter() - started
+
+        print("-" * 30)
+        print("Import Complete.")
+        print(f"Sources: {len(ok)} read, {len(results) - len(ok)} failed")
+        print(f"Imported: {imported_count}")
+        duplicates = sum(r.read for r in ok) - unreadable_count - unknown_count - imported_count
+        print(f"Skipped (Duplicate): {duplicates} ({cross_duplicates} found in more than one source)")
+        print(f"Skipped (Unreadable): {unreadable_count}")
+        print_unknown_units(unknown_units, unknown_count)
+        print(f"Equipment updated: {updated_count}")
+        print(f"Time: {elapsed:.1f}s (slowest source {max((r.seconds for r in results), default=0):.1f}s, "
+              f"all reads {read_seconds:.1f}s)")
+        if conflicts:
+            print(f"Type conflicts ({len(conflicts)} units):")
+            for eq_id, by_source in sorted(conflicts.items()):
+                print(f"  {eq_id}: " + ", ".join(f"{source}={eq_type}" for source, eq_type in by_source.items()))
+        print("-" * 30)
+        print_summary()
+
+    except Exception as e:
+        print(f"An unexpected error occurred: {e}")
+        if 'dest_conn' in locals():
+            dest_conn.rollback()
+    finally:
+        if 'dest_conn' in locals():
+            dest_conn.close()
+
+if __name__ == "__main__":
+    freeze_support()
+    parser = argparse.ArgumentParser(description="Import and merge maintenance history from several legacy pms.db files.")
+    parser.add_argument('sources', nargs='+', help="legacy DB paths, one per yard")
+    parser.add_argument('--full', action='store_true', help="ignore the checkpoints and re-read all rows")
+    parser.add_argument('--snapshot', action='store_true', help="read from local copies of the legacy DBs")
+    parser.add_argument('--immutable', action='store_true',
+                        help="read in place without locking (only while the legacy apps are not writing)")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: one per source)")
+    add_unknown_units_argument(parser)
+    args = parser.parse_args()
+    import_sources(args.sources, args.full, args.snapshot, args.workers, args.include_unknown, args.immutable)
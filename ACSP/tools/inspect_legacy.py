@@ -1,15 +1,18 @@
-import sqlite3
+import argparse
 import os
+import sys
 
-LEGACY_DB_PATH = r'\\172.16.3.237\Technical\주장비 PMS 관리 List\PMS_Manager_v2.0\pms.db'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-def inspect_db():
-    if not os.path.exists(LEGACY_DB_PATH):
-        print(f"File not found: {LEGACY_DB_PATH}")
+from ACSP.tools.legacy_source import LEGACY_DB_PATH, open_source
+
+def inspect_db(source_path=LEGACY_DB_PATH, use_snapshot=False, immutable=False):
+    if not os.path.exists(source_path):
+        print(f"File not found: {source_path}")
         return
 
     try:
-        conn = sqlite3.connect(LEGACY_DB_PATH)
+        conn = open_source(source_path, use_snapshot, immutable)
         cursor = conn.cursor()
         
         # 1. List Tables
@@ -59,4 +62,10 @@ def inspect_db():
             conn.close()
 
 if __name__ == "__main__":
-    inspect_db()
+    parser = argparse.ArgumentParser(description="Print the legacy pms.db schema and sample rows.")
+    parser.add_argument('source', nargs='?', default=LEGACY_DB_PATH, help="legacy DB path")
+    parser.add_argument('--snapshot', action='store_true', help="read from a local copy of the legacy DB")
+    parser.add_argument('--immutable', action='store_true',
+                        help="read in place without locking (only while the legacy app is not writing)")
+    args = parser.parse_args()
+    inspect_db(args.source, args.snapshot, args.immutable)
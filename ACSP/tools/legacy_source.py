@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from urllib.parse import quote
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from ACSP.database import DB_NAME, normalise_date
+
+# Legacy Path
+# Note: Using raw string for Windows path
+LEGACY_DB_PATH = r'\\172.16.3.237\Technical\주장비 PMS 관리 List\PMS_Manager_v2.0\pms.db'
+
+# Local copies of legacy DBs live next to acsp.db
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(DB_NAME)), 'legacy_cache')
+# Pages copied per backup step; each step reports progress
+BACKUP_PAGES_PER_STEP = 1024
+
+def source_uri(path, **params):
+    """
+    SQLite URI for a local or UNC path. UNC shares need an empty authority
+    (file:////server/share/...), drive paths a leading slash (file:///C:/...).
+    """
+    path = os.path.abspath(path).replace(os.sep, '/')
+    if not path.startswith('/'):
+        path = '/' + path
+    query = '&'.join(f"{key}={value}" for key, value in params.items())
+    return f"file://{quote(path, safe='/:')}" + (f"?{query}" if query else '')
+
+def open_readonly(path, immutable=False):
+    """
+    Opens the legacy DB in place, read-only. Reads still take SQLite's
+    shared locks, so they stay consistent while the legacy app writes.
+    immutable=True skips all locking and change detection, which keeps the
+    locks off the SMB share, but is only safe while nothing writes to the
+    file: otherwise commits can be missed or a half-written state read.
+    """
+    params = {'mode': 'ro', 'immutable': 1} if immutable else {'mode': 'ro'}
+    return sqlite3.connect(source_uri(path, **params), uri=True)
+
+def snapshot(path, snapshot_dir=SNAPSHOT_DIR, progress=True):
+    """
+    Returns the path of a consistent local copy of the legacy DB, made
+    with the online backup API. The copy is reused for as long as the
+    source's size and mtime are unchanged, including those of its -wal
+    file: in WAL mode new commits only reach the main file at a checkpoint.
+    """
+    stat = os.stat(path)
+    source = [stat.st_size, stat.st_mtime_ns]
+    if os.path.exists(path + '-wal'):
+        wal = os.stat(path + '-wal')
+        source += [wal.st_size, wal.st_mtime_ns]
+    os.makedirs(snapshot_dir, exist_ok=True)
+    # One snapshot per source, keyed by its normalised path
+    key = hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode('utf-8')).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    local_path = os.path.join(snapshot_dir, f"{stem}-{key}.db")
+    meta_path = local_path + '.json'
+
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == source and os.path.exists(local_path):
+                if progress:
+                    print("Using cached local snapshot (legacy DB unchanged).")
+                return local_path
+    except (OSError, ValueError):
+        pass
+
+    def report(status, remaining, total):
+        if progress and total:
+            print(f"\r  Copying legacy DB: {total - remaining}/{total} pages", end='', flush=True)
+
+    # Copy to a temp file first so a failed copy never replaces a good one
+    temp_path = local_path + '.tmp'
+    src = sqlite3.connect(source_uri(path, mode='ro'), uri=True)
+    dest = sqlite3.connect(temp_path)
+    try:
+        src.backup(dest, pages=BACKUP_PAGES_PER_STEP, progress=report)
+    finally:
+        dest.close()
+        src.close()
+    if progress:
+        print()
+    os.replace(temp_path, local_path)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(source, f)
+    return local_path
+
+def open_source(path=LEGACY_DB_PATH, use_snapshot=False, immutable=False):
+    """
+    Connection for reading a legacy DB: in place via open_readonly(), or
+    against a local snapshot() when use_snapshot is set.
+    """
+    if use_snapshot:
+        return sqlite3.connect(snapshot(path))
+    return open_readonly(path, immutable)
+
+def normalise_history_row(equipment_id, maintenance_date):
+    """
+    Legacy (equipment_id, maintenance_date) in the form acsp.db keys its
+    history on: (int, 'YYYY-MM-DD'), or None when either value is unreadable.
+    """
+    date_str = normalise_date(maintenance_date)
+    try:
+        equipment_id = int(equipment_id)
+    except (TypeError, ValueError):
+        return None
+    return (equipment_id, date_str) if date_str else None
+
+def fetch_known_units(dest_conn, include_unknown=False):
+    """
+    Equipment ids in acsp.db, for HistoryFilter; None when include_unknown
+    is set and history for any unit should be imported.
+    """
+    if include_unknown:
+        return None
+    return {row[0] for row in dest_conn.execute("SELECT id FROM equipment")}
+
+def add_unknown_units_argument(parser):
+    parser.add_argument('--include-unknown', action='store_true',
+                        help="also import history for units that are not in acsp.db")
+
+class HistoryFilter:
+    """
+    Normalises legacy (rowid, equipment_id, maintenance_date) rows and
+    applies the unknown-unit policy shared by the importers: history for
+    units missing from acsp.db is skipped (known_units=None keeps it).
+    checkpoint_row stops before the first skipped row, so that history is
+    read again, and imported once the unit exists, on the next run.
+    """
+    def __init__(self, known_units=None):
+        self.known_units = known_units
+        self.unreadable = 0
+        self.unknown = 0
+        self.unknown_units = set()
+        self.checkpoint_row = None
+        self.held_back = False
+
+    def filter(self, rows):
+        """Returns the (int, 'YYYY-MM-DD') rows to import."""
+        kept = []
+        for raw in rows:
+            row = normalise_history_row(raw[1], raw[2])
+            if row is None:
+                self.unreadable += 1
+            elif self.known_units is not None and row[0] not in self.known_units:
+                self.unknown += 1
+                self.unknown_units.add(row[0])
+                self.held_back = True
+            else:
+                kept.append(row)
+            if not self.held_back:
+                self.checkpoint_row = raw
+        return kept
+
+def print_unknown_units(unit_ids, skipped):
+    """Reports history skipped by HistoryFilter for units not in acsp.db."""
+    if not unit_ids:
+        return
+    unit_ids = sorted(unit_ids)
+    shown = ', '.join(map(str, unit_ids[:20])) + (' ...' if len(unit_ids) > 20 else '')
+    print(f"Skipped (Unknown unit): {skipped} rows for {len(unit_ids)} units not in acsp.db: {shown}")
+    print("  They are read again on the next import; add the units or use --include-unknown.")
@@ -0,0 +1,86 @@
+import argparse
+import os
+import sys
+import time
+from multiprocessing import freeze_support
+
+# Add root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from ACSP.database import init_database, MAINTENANCE_INTERVAL_DAYS
+from ACSP.planner import DEFAULT_CREW_CAPACITY
+from ACSP.simulation import (
+    Scenario, run_scenarios, SIMULATION_DAYS, DEFAULT_REPLICAS, DEFAULT_SEED
+)
+
+def parse_scenario(text, slip):
+    """
+    'name:QC=4,ARMGC=2,interval=40,slip=0.2' -> Scenario. Omitted keys keep
+    the current setting; the name is optional. Raises ValueError for keys
+    other than interval, slip and the crew types.
+    """
+    name, _, spec = text.rpartition(':')
+    capacity = dict(DEFAULT_CREW_CAPACITY)
+    interval = MAINTENANCE_INTERVAL_DAYS
+    for item in filter(None, spec.split(',')):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key == 'interval':
+            interval = int(value)
+        elif key == 'slip':
+            slip = float(value)
+        elif key.upper() in DEFAULT_CREW_CAPACITY:
+            capacity[key.upper()] = int(value)
+        else:
+            known = ', '.join(['interval', 'slip', *sorted(DEFAULT_CREW_CAPACITY)])
+            raise ValueError(f"unknown key '{key}' in scenario '{text}' (expected {known})")
+    return Scenario(name or spec, capacity, interval, slip)
+
+def default_scenarios(slip):
+    # Current roster, one more crew slot per type, and a shorter interval
+    current = Scenario.baseline(slip=slip)
+    scenarios = [current]
+    for eq_type in sorted(current.capacity):
+        capacity = dict(current.capacity, **{eq_type: current.capacity[eq_type] + 1})
+        scenarios.append(Scenario(f"{eq_type}+1", capacity, current.interval, slip))
+    scenarios.append(Scenario(f"interval={MAINTENANCE_INTERVAL_DAYS - 5}", current.capacity, MAINTENANCE_INTERVAL_DAYS - 5, slip))
+    return scenarios
+
+def main():
+    parser = argparse.ArgumentParser(description="What-if simulation of crew capacity and maintenance interval.")
+    parser.add_argument('-s', '--scenario', action='append', default=[],
+                        help="e.g. 'QC=4' or 'roster-b:QC=4,ARMGC=2,interval=40' (repeatable)")
+    parser.add_argument('--days', type=int, default=SIMULATION_DAYS)
+    parser.add_argument('--replicas', type=int, default=DEFAULT_REPLICAS)
+    parser.add_argument('--slip', type=float, default=0.1, help="chance that a planned service slips")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all CPUs)")
+    args = parser.parse_args()
+
+    if args.replicas < 1:
+        parser.error("--replicas must be at least 1")
+    try:
+        scenarios = [parse_scenario(s, args.slip) for s in args.scenario] or default_scenarios(args.slip)
+    except ValueError as e:
+        parser.error(str(e))
+    init_database()
+
+    print(f"Simulating {len(scenarios)} scenarios x {args.replicas} replicas over {args.days} days (seed {args.seed})...")
+    started = time.perf_counter()
+    results = run_scenarios(scenarios, args.days, args.replicas, args.seed, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print("-" * 78)
+    print(f"{'Scenario':<18}{'Capacity':<20}{'Interval':>9}{'Mean':>8}{'P5':>8}{'P50':>8}{'P95':>8}")
+    for result in results:
+        scenario = result.scenario
+        capacity = ' '.join(f"{t}={n}" for t, n in sorted(scenario.capacity.items()))
+        print(f"{scenario.name:<18}{capacity:<20}{scenario.interval:>9}"
+              f"{result.mean:>7.1f}%{result.percentile(5):>7.1f}%"
+              f"{result.percentile(50):>7.1f}%{result.percentile(95):>7.1f}%")
+    print("-" * 78)
+    print(f"Overdue rate = mean share of units overdue per day. Took {elapsed:.1f}s.")
+
+if __name__ == "__main__":
+    freeze_support()
+    main()
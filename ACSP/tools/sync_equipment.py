@@ -1,53 +1,165 @@
-import sqlite3
+import argparse
 import os
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 
-from ACSP.database import get_connection
+from ACSP.database import get_connection, init_database, schema_is_current, SUPPORTS_UPDATE_FROM
+from ACSP.core import print_summary
+from ACSP.tools.legacy_source import LEGACY_DB_PATH, open_source, normalise_date
 
-LEGACY_DB_PATH = r'\\172.16.3.237\Technical\주장비 PMS 관리 List\PMS_Manager_v2.0\pms.db'
+# Legacy rows are compared against equipment through this table
+_CREATE_STAGING = '''
+    CREATE TEMP TABLE IF NOT EXISTS legacy_equipment (
+        id INTEGER PRIMARY KEY,
+        last_maintenance_date TEXT,
+        next_maintenance_date TEXT,
+        type TEXT
+    )
+'''
 
-def sync_equipment():
-    print(f"Syncing equipment data from: {LEGACY_DB_PATH}")
-    
-    if not os.path.exists(LEGACY_DB_PATH):
+# Rows whose dates differ, as (id, old last, old next, new last, new next)
+_CHANGED = '''
+    SELECT e.id, e.last_maintenance_date, e.next_maintenance_date,
+           l.last_maintenance_date, l.next_maintenance_date
+    FROM equipment e
+    JOIN legacy_equipment l ON l.id = e.id
+    WHERE e.last_maintenance_date IS NOT l.last_maintenance_date
+       OR e.next_maintenance_date IS NOT l.next_maintenance_date
+    ORDER BY e.id
+'''
+
+# Copies the staged dates onto the units whose dates differ
+_UPDATE_CHANGED = '''
+    UPDATE equipment
+    SET last_maintenance_date = l.last_maintenance_date,
+        next_maintenance_date = l.next_maintenance_date
+    FROM legacy_equipment AS l
+    WHERE equipment.id = l.id
+      AND (equipment.last_maintenance_date IS NOT l.last_maintenance_date
+           OR equipment.next_maintenance_date IS NOT l.next_maintenance_date)
+'''
+
+# For SQLite before 3.33, which has no UPDATE ... FROM
+_UPDATE_CHANGED_CORRELATED = '''
+    UPDATE equipment
+    SET last_maintenance_date = (SELECT l.last_maintenance_date FROM legacy_equipment l WHERE l.id = equipment.id),
+        next_maintenance_date = (SELECT l.next_maintenance_date FROM legacy_equipment l WHERE l.id = equipment.id)
+    WHERE EXISTS (
+        SELECT 1 FROM legacy_equipment l
+        WHERE l.id = equipment.id
+          AND (equipment.last_maintenance_date IS NOT l.last_maintenance_date
+               OR equipment.next_maintenance_date IS NOT l.next_maintenance_date)
+    )
+'''
+
+def load_legacy_equipment(src_conn, dest_conn):
+    """
+    Copies the legacy equipment rows into the legacy_equipment temp table,
+    with both dates normalised to YYYY-MM-DD. Rows with an unreadable date
+    are not staged, so those units are left as they are.
+    Returns (legacy row count, unreadable rows).
+    """
+    columns = [info[1] for info in src_conn.execute("PRAGMA table_info(equipment)")]
+    # Older legacy files have no type column; new units then get the default
+    type_column = 'type' if 'type' in columns else 'NULL'
+    rows = src_conn.execute(
+        f"SELECT id, last_maintenance_date, next_maintenance_date, {type_column} FROM equipment"
+    ).fetchall()
+    staged = []
+    unreadable = []
+    for eq_id, last_date, next_date, eq_type in rows:
+        fixed = (normalise_date(last_date), normalise_date(next_date))
+        if None in fixed:
+            unreadable.append((eq_id, last_date, next_date))
+        else:
+            staged.append((eq_id, *fixed, eq_type))
+    dest_conn.execute(_CREATE_STAGING)
+    dest_conn.execute("DELETE FROM legacy_equipment")
+    dest_conn.executemany("INSERT OR REPLACE INTO legacy_equipment VALUES (?, ?, ?, ?)", staged)
+    return len(rows), unreadable
+
+def diff_equipment(dest_conn):
+    """Returns (new ids, changed rows, unchanged count, missing ids) against the staged rows."""
+    new_ids = [row[0] for row in dest_conn.execute('''
+        SELECT id FROM legacy_equipment
+        WHERE id NOT IN (SELECT id FROM equipment) ORDER BY id
+    ''')]
+    changed = dest_conn.execute(_CHANGED).fetchall()
+    missing_ids = [row[0] for row in dest_conn.execute('''
+        SELECT id FROM equipment
+        WHERE id NOT IN (SELECT id FROM legacy_equipment) ORDER BY id
+    ''')]
+    matched = dest_conn.execute('''
+        SELECT COUNT(*) FROM equipment WHERE id IN (SELECT id FROM legacy_equipment)
+    ''').fetchone()[0]
+    return new_ids, changed, matched - len(changed), missing_ids
+
+def apply_equipment(dest_conn):
+    """Writes the staged rows: inserts new units and updates only changed dates."""
+    inserted = dest_conn.execute('''
+        INSERT INTO equipment (id, last_maintenance_date, next_maintenance_date, type)
+        SELECT id, last_maintenance_date, next_maintenance_date, COALESCE(type, 'ARMGC')
+        FROM legacy_equipment
+        WHERE id NOT IN (SELECT id FROM equipment)
+    ''').rowcount
+    changed = dest_conn.execute(_UPDATE_CHANGED if SUPPORTS_UPDATE_FROM else _UPDATE_CHANGED_CORRELATED).rowcount
+    return inserted, changed
+
+def sync_equipment(source_path=LEGACY_DB_PATH, use_snapshot=False, dry_run=False, immutable=False):
+    print(f"Syncing equipment data from: {source_path}")
+
+    if not os.path.exists(source_path):
         print("Error: Cannot access legacy DB file.")
         return
-    
+
     try:
         # Connect to Source
-        src_conn = sqlite3.connect(LEGACY_DB_PATH)
-        src_cursor = src_conn.cursor()
-        
-        # Connect to Dest
+        src_conn = open_source(source_path, use_snapshot, immutable)
+
+        # Connect to Dest; a dry run must not migrate (write) the schema
+        if dry_run and not schema_is_current():
+            print("Error: acsp.db is missing or its schema is out of date; run without --dry-run to migrate it.")
+            return
+        if not dry_run:
+            init_database()
         dest_conn = get_connection()
-        dest_cursor = dest_conn.cursor()
-        
-        # Fetch all equipment from legacy
-        src_cursor.execute("SELECT id, last_maintenance_date, next_maintenance_date FROM equipment")
-        rows = src_cursor.fetchall()
-        
-        updated_count = 0
-        
-        for eq_id, last_date, next_date in rows:
-            dest_cursor.execute('''
-                UPDATE equipment 
-                SET last_maintenance_date = ?, 
-                    next_maintenance_date = ?
-                WHERE id = ?
-            ''', (last_date, next_date, eq_id))
-            
-            if dest_cursor.rowcount > 0:
-                updated_count += 1
-        
-        dest_conn.commit()
-        
+
+        legacy_count, unreadable = load_legacy_equipment(src_conn, dest_conn)
+        new_ids, changed, unchanged_count, missing_ids = diff_equipment(dest_conn)
+        unreadable_ids = {row[0] for row in unreadable}
+        missing_ids = [eq_id for eq_id in missing_ids if eq_id not in unreadable_ids]
+
+        if dry_run:
+            print(f"Dry run: {legacy_count} legacy equipment rows compared, nothing written.")
+            for eq_id, old_last, old_next, new_last, new_next in changed:
+                print(f"  ~ {eq_id}: {old_last} / {old_next} -> {new_last} / {new_next}")
+            for eq_id in new_ids:
+                print(f"  + {eq_id}: new unit")
+            for eq_id in missing_ids:
+                print(f"  ? {eq_id}: not in legacy DB (kept)")
+            for eq_id, last_date, next_date in unreadable:
+                print(f"  ! {eq_id}: unreadable dates {last_date!r} / {next_date!r} (kept)")
+            inserted_count, changed_count = len(new_ids), len(changed)
+            dest_conn.rollback()
+        else:
+            inserted_count, changed_count = apply_equipment(dest_conn)
+            dest_conn.commit()
+            for eq_id, last_date, next_date in unreadable:
+                print(f"Skipped unit {eq_id}: unreadable dates {last_date!r} / {next_date!r}")
+        dest_conn.execute("DROP TABLE IF EXISTS temp.legacy_equipment")
+
         print("-" * 30)
-        print(f"Sync Complete.")
-        print(f"Updated: {updated_count} equipment records")
+        print("Sync Complete." if not dry_run else "Sync Preview.")
+        print(f"Inserted: {inserted_count}")
+        print(f"Changed: {changed_count}")
+        print(f"Unchanged: {unchanged_count}")
+        print(f"Skipped (Unreadable): {len(unreadable)}")
+        print(f"Missing from legacy: {len(missing_ids)}")
         print("-" * 30)
-        
+        if not dry_run:
+            print_summary()
+
     except Exception as e:
         print(f"Error: {e}")
     finally:
@@ -57,4 +169,11 @@ def sync_equipment():
             dest_conn.close()
 
 if __name__ == "__main__":
-    sync_equipment()
+    parser = argparse.ArgumentParser(description="Sync equipment dates from the legacy pms.db.")
+    parser.add_argument('source', nargs='?', default=LEGACY_DB_PATH, help="legacy DB path")
+    parser.add_argument('--snapshot', action='store_true', help="read from a local copy of the legacy DB")
+    parser.add_argument('--immutable', action='store_true',
+                        help="read in place without locking (only while the legacy app is not writing)")
+    parser.add_argument('--dry-run', action='store_true', help="print the differences without writing")
+    args = parser.parse_args()
+    sync_equipment(args.source, args.snapshot, args.dry_run, args.immutable)
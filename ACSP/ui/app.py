@@ -1,18 +1,48 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
-from ..database import get_connection
+from datetime import datetime, time, timedelta
+from ..database import record_maintenance, fetch_data_version, add_change_listener, STATUS_LABELS
+from ..model import FleetModel, MonthCache
+from ..analytics import TrendEngine
 from .calendar import MaintenanceCalendar
 from .graph import OverdueGraph
+from .trend import TrendGraph
+from .worker import DatabaseWorker
 from .styles import apply_styles, COLORS, FONTS
 
+# Dashboard rows are (id, last_date, status, days_passed, days_remaining)
+STATUS_RANK = {'overdue': 0, 'warning': 1, 'good': 2}
+
+# Multi-column sort keys per Treeview column; later fields break ties
+SORT_KEYS = {
+    'ID': lambda r: r[0],
+    'Last Maintenance': lambda r: (r[1], r[0]),
+    'Status': lambda r: (STATUS_RANK[r[2]], r[4], r[0]),
+    'Days Passed': lambda r: (r[3], r[0]),
+    'Remaining': lambda r: (r[4], r[0]),
+}
+
+def format_row(row):
+    id_val, last_date, status, days_passed, days_remaining = row
+    return (
+        id_val,
+        last_date,
+        STATUS_LABELS[status],
+        f"{days_passed} days",
+        f"{days_remaining} days"
+    )
+
 class ACSPApp:
+    # How often to check whether another client changed the database
+    CHANGE_POLL_MS = 3000
+
     def __init__(self, root):
         self.root = root
         self.root.title("ACSP - Ai Crane Scheduler Program")
         self.root.geometry("1200x800")
         
         self.style = apply_styles(root)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
         
         # Main Layout Container
         self.main_container = ttk.Frame(self.root, style='Main.TFrame')
@@ -27,10 +57,27 @@ class ACSPApp:
         
         self.create_dashboard()
         
+        # All database work runs off the Tk thread
+        self.worker = DatabaseWorker(self.root, on_busy_change=self.set_busy)
+        # Fleet snapshot shared with the graph window, month history
+        # shared by calendar windows, and the historical trend
+        self.fleet = FleetModel()
+        self.months = MonthCache()
+        self.trends = TrendEngine()
+        
+        # Change detection: other clients via data_version, this client via
+        # the write-path listener (set from the worker thread, read here)
+        self.data_version = None
+        self.local_change = False
+        add_change_listener(self._on_local_change)
+        
         # Initial Data Load
         self.current_type_filter = 'ARMGC' # Default
         self.current_status_filter = 'all'
         self.load_data()
+        self.root.after(self.CHANGE_POLL_MS, self.poll_changes)
+        self.rollover_id = None
+        self.schedule_rollover()
 
     def create_sidebar(self):
         sidebar = ttk.Frame(self.main_container, style='Sidebar.TFrame', width=250)
@@ -51,6 +98,15 @@ class ACSPApp:
         self._create_stat_item(self.stats_frame, "Overdue", "overdue_val")
         self._create_stat_item(self.stats_frame, "Warning", "warning_val")
 
+        # Units whose last date cannot be read (and so have no status)
+        self.undated_label = ttk.Label(sidebar, text="", style='Sidebar.TLabel', font=FONTS['small'],
+                                       foreground=COLORS['danger'], wraplength=210, justify='left')
+        self.undated_label.pack(anchor='w', padx=20)
+
+        # Busy indicator (shown while database work is in flight)
+        self.busy_label = ttk.Label(sidebar, text="", style='Sidebar.TLabel', font=FONTS['small'])
+        self.busy_label.pack(anchor='w', padx=20)
+
         # Navigation Buttons (Spacer)
         ttk.Frame(sidebar, style='Sidebar.TFrame', height=40).pack()
         
@@ -146,6 +202,9 @@ class ACSPApp:
         
         self.sort_column = None
         self.sort_reverse = False
+        # Typed rows currently shown, keyed by Treeview iid (the equipment id)
+        self.rows = {}
+        self._sort_cache = {}
         
         scrollbar = ttk.Scrollbar(list_card, orient='vertical', command=self.tree.yview)
         self.tree.configure(yscrollcommand=scrollbar.set)
@@ -179,24 +238,21 @@ class ACSPApp:
         else:
             self.sort_reverse = False
         self.sort_column = column
-        
-        items = [(self.tree.set(item, column), item) for item in self.tree.get_children('')]
-        
-        def sort_key(val):
-            try:
-                # Handle "X days" format
-                if isinstance(val, str) and ' days' in val:
-                    return int(val.replace(' days', ''))
-                # Handle pure numbers
-                return int(val)
-            except ValueError:
-                # Fallback to string
-                return val
-        
-        items.sort(key=lambda x: sort_key(x[0]), reverse=self.sort_reverse)
-            
-        for index, (_, item) in enumerate(items):
-            self.tree.move(item, '', index)
+        self._apply_sort()
+
+    def _apply_sort(self):
+        # Sorts the typed rows, not the displayed strings. The ascending
+        # order per column is cached until the rows change, so repeated
+        # header clicks only reverse it.
+        order = self._sort_cache.get(self.sort_column)
+        if order is None:
+            key = SORT_KEYS[self.sort_column]
+            order = sorted(self.rows, key=lambda iid: key(self.rows[iid]))
+            self._sort_cache[self.sort_column] = order
+        if self.sort_reverse:
+            order = order[::-1]
+        # One batched reorder instead of a move() per row
+        self.tree.set_children('', *order)
 
     def switch_type(self, type_val):
         self.current_type_filter = type_val
@@ -206,13 +262,70 @@ class ACSPApp:
         self.current_status_filter = status
         self.load_data()
 
+    def set_busy(self, busy):
+        self.busy_label.config(text="Loading..." if busy else "")
+        self.root.config(cursor='watch' if busy else '')
+
+    def on_close(self):
+        self.worker.shutdown()
+        self.root.destroy()
+
+    def _on_local_change(self, dates=None):
+        self.local_change = True
+
+    def poll_changes(self):
+        self.worker.submit(fetch_data_version, key='data_version', quiet=True, on_done=self._check_data_version)
+        self.root.after(self.CHANGE_POLL_MS, self.poll_changes)
+
+    def _check_data_version(self, version):
+        external = self.data_version is not None and version != self.data_version
+        self.data_version = version
+        if not (external or self.local_change):
+            return
+        
+        self.local_change = False
+        if external:
+            self.fleet.invalidate()
+            self.months.clear()
+            self.trends.invalidate()
+        self.load_data()
+        self.reload_windows()
+
+    def reload_windows(self):
+        # Refresh any open calendar/graph windows as well
+        for child in self.root.winfo_children():
+            if isinstance(child, (MaintenanceCalendar, OverdueGraph, TrendGraph)):
+                child.reload()
+
+    def schedule_rollover(self):
+        """
+        Arms a single timer for the next status transition or midnight,
+        whichever is first, so an app left open overnight stays current.
+        """
+        if self.rollover_id is not None:
+            self.root.after_cancel(self.rollover_id)
+        
+        now = datetime.now()
+        wake = datetime.combine(now.date() + timedelta(days=1), time.min)
+        next_transition = self.fleet.next_transition()
+        if next_transition is not None:
+            wake = max(min(wake, datetime.combine(next_transition, time.min)), now)
+        # Small margin so the date has definitely changed when we wake
+        delay_ms = int((wake - now).total_seconds() * 1000) + 500
+        self.rollover_id = self.root.after(delay_ms, self._on_rollover)
+
+    def _on_rollover(self):
+        self.rollover_id = None
+        # The fleet model advances in memory: only units whose transition is
+        # due change bucket, and the diff refresh updates the counters
+        self.load_data()
+        self.reload_windows()
+        self.schedule_rollover()
+
     def load_data(self, filter_mode=None):
         if filter_mode:
             self.current_status_filter = filter_mode
             
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
         # UI Feedback for active filter (Optional but good)
         if self.current_type_filter == 'ARMGC':
             self.btn_armgc.state(['pressed'])
@@ -221,64 +334,56 @@ class ACSPApp:
             self.btn_armgc.state(['!pressed'])
             self.btn_qc.state(['pressed'])
             
-        total_cnt = 0
-        overdue_cnt = 0
-        warning_cnt = 0
-        
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM equipment')
-            rows = cursor.fetchall()
-            
-        for row in rows:
-            # Row structure: id, last_date, next_date, type (if using index access, be careful with new column)
-            # Safe unpacking if column count varies?
-            # Creating dict or just using index
-            id_val = row[0]
-            last_date = row[1]
-            eq_type = row[3] if len(row) > 3 else 'ARMGC' # Default fallback
-            
-            # Type Filter
-            if eq_type != self.current_type_filter:
-                continue
-                
-            total_cnt += 1
-            
-            last_maintenance = datetime.strptime(last_date, '%Y-%m-%d')
-            today_date = datetime.now()
-            days_passed = (today_date - last_maintenance).days
-            days_remaining = 45 - days_passed
-            
-            status_text = "Good"
-            tag = 'good'
-            
-            if days_remaining < 0:
-                tag = 'overdue'
-                status_text = "OVERDUE"
-                overdue_cnt += 1
-            elif days_remaining < 10:
-                tag = 'warning'
-                status_text = "Warning"
-                warning_cnt += 1
-            
-            # Status Filter
-            if self.current_status_filter == 'overdue' and tag != 'overdue':
-                continue
-            if self.current_status_filter == 'warning' and tag != 'warning':
-                continue
-            
-            self.tree.insert('', 'end', values=(
-                id_val,
-                last_date,
-                status_text,
-                f"{days_passed} days",
-                f"{days_remaining} days"
-            ), tags=(tag,))
+        # Filter switches are served from the cached snapshot; SQLite is only
+        # read (in the background) after a write or a day change
+        snapshot = self.fleet.snapshot
+        if snapshot is not None:
+            self.worker.cancel('load_data')
+            self._render_dashboard(snapshot)
+        else:
+            self.worker.submit(self.fleet.load, key='load_data', on_done=self._render_dashboard)
+
+    def _render_dashboard(self, snapshot):
+        status_filter = None if self.current_status_filter == 'all' else self.current_status_filter
+        rows = snapshot.select(self.current_type_filter, status_filter)
+        total_cnt, overdue_cnt, warning_cnt = snapshot.counts(self.current_type_filter)
+        
+        # Diff against what is on screen so unchanged rows, the selection
+        # and the scroll position are left alone
+        new_rows = {
+            str(id_val): (id_val, last_date, status, days_passed, days_remaining)
+            for id_val, _, last_date, days_passed, days_remaining, status in rows
+        }
+        
+        removed = [iid for iid in self.rows if iid not in new_rows]
+        if removed:
+            self.tree.delete(*removed)
+        
+        changed = bool(removed)
+        for index, (iid, row) in enumerate(new_rows.items()):
+            old = self.rows.get(iid)
+            if old is None:
+                # Rows arrive ordered by id, so index is the unsorted position
+                self.tree.insert('', index, iid=iid, values=format_row(row), tags=(row[2],))
+                changed = True
+            elif old != row:
+                self.tree.item(iid, values=format_row(row), tags=(row[2],))
+                changed = True
+        self.rows = new_rows
+        
+        if changed:
+            self._sort_cache.clear()
+            if self.sort_column:
+                self._apply_sort()
             
         # Update Stats
         self.total_val.config(text=str(total_cnt))
         self.overdue_val.config(text=str(overdue_cnt))
         self.warning_val.config(text=str(warning_cnt))
+        undated = [str(eq_id) for eq_id, eq_type, _ in snapshot.undated if eq_type == self.current_type_filter]
+        self.undated_label.config(
+            text=f"⚠ No valid last date: unit {', '.join(undated)}" if undated else ""
+        )
 
     def complete_maintenance(self):
         selected_item = self.tree.selection()
@@ -296,34 +401,24 @@ class ACSPApp:
             return
             
         maintenance_date = selected_date.strftime('%Y-%m-%d')
-        next_date = (selected_date + timedelta(days=45)).strftime('%Y-%m-%d')
-        
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE equipment 
-                SET last_maintenance_date = ?, 
-                    next_maintenance_date = ?
-                WHERE id = ?
-            ''', (maintenance_date, next_date, equipment_id))
-            
-            cursor.execute('''
-                INSERT INTO maintenance_history (equipment_id, maintenance_date)
-                VALUES (?, ?)
-            ''', (equipment_id, maintenance_date))
-            
-            conn.commit()
         
-        self.load_data()
-        messagebox.showinfo("Success", f"Maintenance recorded for Unit {equipment_id}")
+        def on_done(_):
+            self.load_data()
+            messagebox.showinfo("Success", f"Maintenance recorded for Unit {equipment_id}")
+        
+        self.worker.submit(
+            record_maintenance, equipment_id, maintenance_date,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", str(e))
+        )
 
     def show_calendar(self):
-        cal_win = MaintenanceCalendar(self.root)
+        cal_win = MaintenanceCalendar(self.root, self.worker, self.months)
         cal_win.transient(self.root)
         cal_win.grab_set()
 
     def show_graph(self):
-        graph_win = OverdueGraph(self.root)
+        graph_win = OverdueGraph(self.root, self.worker, self.fleet, self.trends)
         graph_win.transient(self.root)
         # graph_win.grab_set() # Optional: Modal or not? Let's keep it non-modal so they can compare
 
@@ -1,36 +1,59 @@
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 import calendar
-from datetime import datetime, timedelta
-from ..database import get_connection, add_maintenance_history, update_maintenance_history, delete_maintenance_history
+from datetime import datetime, date
+from ..database import add_maintenance_history, update_maintenance_history, delete_maintenance_history
+from ..model import adjacent_months, month_of
+from ..planner import plan_maintenance
 from .styles import COLORS, FONTS  # Re-use styles if possible or just use defaults
 
+# Weeks start on Sunday
+MONTH_CALENDAR = calendar.Calendar(firstweekday=6)
+# (day, QC ids, ARMGC ids, planned ids) text of a cell with nothing in it
+BLANK_CELL = ("", "", "", "")
+
 class CanvasCalendar(tk.Frame):
+    """
+    Retained-mode month grid: every canvas item is created once, and later
+    draws only update the cells whose content changed and move the
+    selection/today markers.
+    """
+    WEEKS = 6
+
     def __init__(self, master, year, month, equipment_map=None, select_callback=None):
         super().__init__(master)
         self.year = year
         self.month = month
         self.equipment_map = equipment_map if equipment_map else {}
+        # Planned services, same shape as equipment_map; empty when hidden
+        self.plan_map = {}
         self.select_callback = select_callback
         self.selected_day = None
         self.cell_width = 80
         self.cell_height = 75
         self.header_height = 100
         
+        # Day layout of the displayed month, rebuilt only when it changes
+        self.layout_month = None
+        self.month_days = []
+        self.day_cells = {}  # day -> (week_idx, day_idx)
+        # (week_idx, day_idx) -> text the cell currently shows, None if hidden
+        self.cell_content = {}
+        
         self.canvas = tk.Canvas(
             self,
             width=self.cell_width*7,
-            height=self.header_height + self.cell_height*6 + 10,
+            height=self.header_height + self.cell_height*self.WEEKS + 10,
             bg='white'
         )
         self.canvas.pack()
+        self._create_items()
         self.draw_calendar()
         self.canvas.bind("<Button-1>", self.on_click)
         self.canvas.tag_bind("prev_month", "<Button-1>", self.on_prev_month)
         self.canvas.tag_bind("next_month", "<Button-1>", self.on_next_month)
 
-    def draw_calendar(self):
-        self.canvas.delete("all")
+    def _create_items(self):
         # Icons
         icon_y = 36
         icon_size = 22
@@ -38,10 +61,9 @@ class CanvasCalendar(tk.Frame):
         self.next_icon = self.canvas.create_text(self.cell_width*7-32, icon_y, text="▶", font=("Segoe UI", icon_size, "bold"), fill="#2667c9", activefill="#114488", tags="next_month")
         
         # Header
-        month_year_str = f"{self.year}년 {self.month:02d}월"
-        self.canvas.create_text(
+        self.title_item = self.canvas.create_text(
             self.cell_width*3.5, 30,
-            text=month_year_str,
+            text="",
             font=("Segoe UI", 24, "bold"),
             fill="#222",
             anchor="n"
@@ -52,60 +74,107 @@ class CanvasCalendar(tk.Frame):
         for i, day in enumerate(days):
             self.canvas.create_rectangle(i*self.cell_width, self.header_height-30, (i+1)*self.cell_width, self.header_height-10, fill="#f0f4fa", outline="#e0e6ef")
             self.canvas.create_text(i*self.cell_width + self.cell_width//2, self.header_height-20, text=day, font=("Segoe UI", 14, "bold"), fill="#2667c9")
-            
-        # Days cells
-        cal = calendar.Calendar(firstweekday=6)
-        month_days = cal.monthdayscalendar(self.year, self.month)
         
-        for week_idx, week in enumerate(month_days):
-            for day_idx, day in enumerate(week):
-                x = day_idx * self.cell_width
-                y = self.header_height + week_idx * self.cell_height
-                
-                # Background
-                self.canvas.create_rectangle(x, y, x+self.cell_width, y+self.cell_height, fill="#fbfcfd", outline="#e0e6ef", width=2)
+        # Cell backgrounds first, then the markers, then the text on top
+        self.cell_items = {}
+        for week_idx in range(self.WEEKS):
+            for day_idx in range(7):
+                x, y = self._cell_origin(week_idx, day_idx)
+                self.cell_items[(week_idx, day_idx)] = {
+                    'bg': self.canvas.create_rectangle(x, y, x+self.cell_width, y+self.cell_height, fill="#fbfcfd", outline="#e0e6ef", width=2)
+                }
+                self.cell_content[(week_idx, day_idx)] = BLANK_CELL
+        
+        self.today_marker = self.canvas.create_oval(0, 0, 0, 0, outline="#ffb347", width=2, state='hidden')
+        self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, fill="#e3f0ff", outline="#2667c9", width=3, state='hidden')
+        
+        for (week_idx, day_idx), items in self.cell_items.items():
+            x, y = self._cell_origin(week_idx, day_idx)
+            items['day'] = self.canvas.create_text(x+14, y+12, text="", anchor='nw', font=("Segoe UI", 13, "bold"), fill="#222")
+            # QC (Top), red
+            items['QC'] = self.canvas.create_text(x+self.cell_width//2, y+30, text="", fill="#FF0000", font=("Segoe UI", 8, "bold"), anchor='n')
+            # ARMGC (Bottom), blue
+            items['ARMGC'] = self.canvas.create_text(x+self.cell_width//2, y+50, text="", fill="#4a90e2", font=("Segoe UI", 8, "bold"), anchor='n')
+            # Planned services (overlay), green
+            items['plan'] = self.canvas.create_text(x+self.cell_width//2, y+63, text="", fill=COLORS['success'], font=("Segoe UI", 7, "italic"), anchor='n')
+        
+        # Outer border
+        self.canvas.create_rectangle(0, 0, self.cell_width*7, self.header_height+self.cell_height*self.WEEKS, outline="#b7c7e0", width=2)
+
+    def _cell_origin(self, week_idx, day_idx):
+        return day_idx * self.cell_width, self.header_height + week_idx * self.cell_height
+
+    def draw_calendar(self):
+        """Brings the canvas in line with year/month/equipment_map/plan_map/selected_day."""
+        if self.layout_month != (self.year, self.month):
+            self.layout_month = (self.year, self.month)
+            self.month_days = MONTH_CALENDAR.monthdayscalendar(self.year, self.month)
+            self.day_cells = {
+                day: (week_idx, day_idx)
+                for week_idx, week in enumerate(self.month_days)
+                for day_idx, day in enumerate(week)
+                if day != 0
+            }
+            self.canvas.itemconfigure(self.title_item, text=f"{self.year}년 {self.month:02d}월")
+        
+        for week_idx in range(self.WEEKS):
+            for day_idx in range(7):
+                content = self._cell_text(week_idx, day_idx)
+                old = self.cell_content[(week_idx, day_idx)]
+                if old == content:
+                    continue
+                self.cell_content[(week_idx, day_idx)] = content
                 
-                if day != 0:
-                    date_str = f"{self.year}-{self.month:02d}-{day:02d}"
-                    eq_data = self.equipment_map.get(date_str, {})
-                    
-                    today = datetime.now().date()
-                    this_day = datetime(self.year, self.month, day).date()
-                    
-                    if self.selected_day == day:
-                        self.canvas.create_rectangle(x+4, y+4, x+self.cell_width-4, y+self.cell_height-4, fill="#e3f0ff", outline="#2667c9", width=3)
-                    elif this_day == today:
-                        self.canvas.create_oval(x+7, y+7, x+self.cell_width-7, y+self.cell_height-32, outline="#ffb347", width=2)
-                        
-                    self.canvas.create_text(x+14, y+12, text=str(day), anchor='nw', font=("Segoe UI", 13, "bold"), fill="#222")
-                    
-                    # Draw QC (Top)
-                    qc_ids = eq_data.get('QC', [])
-                    if qc_ids:
-                        qc_text = ",".join(qc_ids)
-                        # Truncate if too long?
-                        self.canvas.create_text(
-                            x+self.cell_width//2, y+30,
-                            text=qc_text,
-                            fill="#FF0000", # Red for QC
-                            font=("Segoe UI", 8, "bold"),
-                            anchor='n'
-                        )
+                items = self.cell_items[(week_idx, day_idx)]
+                # Weeks the month does not use are left blank
+                if (old is None) != (content is None):
+                    self.canvas.itemconfigure(items['bg'], state='hidden' if content is None else 'normal')
+                for name, old_text, text in zip(('day', 'QC', 'ARMGC', 'plan'), old or BLANK_CELL, content or BLANK_CELL):
+                    if text != old_text:
+                        self.canvas.itemconfigure(items[name], text=text)
+        
+        self._place_markers()
+
+    def _cell_text(self, week_idx, day_idx):
+        if week_idx >= len(self.month_days):
+            return None
+        day = self.month_days[week_idx][day_idx]
+        if day == 0:
+            return BLANK_CELL
+        date_str = f"{self.year}-{self.month:02d}-{day:02d}"
+        eq_data = self.equipment_map.get(date_str, {})
+        planned = self.plan_map.get(date_str, {})
+        planned_ids = planned.get('QC', []) + planned.get('ARMGC', [])
+        return (
+            str(day), ",".join(eq_data.get('QC', [])), ",".join(eq_data.get('ARMGC', [])),
+            "▸" + ",".join(planned_ids) if planned_ids else ""
+        )
+
+    def select_day(self, day):
+        # Selection only moves the highlight item
+        self.selected_day = day
+        self._place_markers()
 
-                    # Draw ARMGC (Bottom)
-                    armgc_ids = eq_data.get('ARMGC', [])
-                    if armgc_ids:
-                        armgc_text = ",".join(armgc_ids)
-                        self.canvas.create_text(
-                            x+self.cell_width//2, y+50,
-                            text=armgc_text,
-                            fill="#4a90e2", # Blue for ARMGC
-                            font=("Segoe UI", 8, "bold"),
-                            anchor='n'
-                        )
+    def _place_markers(self):
+        cell = self.day_cells.get(self.selected_day)
+        if cell:
+            x, y = self._cell_origin(*cell)
+            self.canvas.coords(self.highlight, x+4, y+4, x+self.cell_width-4, y+self.cell_height-4)
+            self.canvas.itemconfigure(self.highlight, state='normal')
+        else:
+            self.canvas.itemconfigure(self.highlight, state='hidden')
         
-        # Outer border
-        self.canvas.create_rectangle(0, 0, self.cell_width*7, self.header_height+self.cell_height*6, outline="#b7c7e0", width=2)
+        # The today ring is not drawn on the selected day
+        today = date.today()
+        cell = None
+        if (today.year, today.month) == (self.year, self.month) and today.day != self.selected_day:
+            cell = self.day_cells.get(today.day)
+        if cell:
+            x, y = self._cell_origin(*cell)
+            self.canvas.coords(self.today_marker, x+7, y+7, x+self.cell_width-7, y+self.cell_height-32)
+            self.canvas.itemconfigure(self.today_marker, state='normal')
+        else:
+            self.canvas.itemconfigure(self.today_marker, state='hidden')
 
     def on_prev_month(self, event=None):
         if hasattr(self.master.master, 'prev_month'):
@@ -118,22 +187,22 @@ class CanvasCalendar(tk.Frame):
     def on_click(self, event):
         col = event.x // self.cell_width
         row = (event.y - self.header_height) // self.cell_height
-        cal = calendar.Calendar(firstweekday=6)
-        month_days = cal.monthdayscalendar(self.year, self.month)
+        month_days = self.month_days
         
         if 0 <= row < len(month_days) and 0 <= col < 7:
             day = month_days[row][col]
             if day != 0:
-                self.selected_day = day
-                self.draw_calendar()
+                self.select_day(day)
                 if self.select_callback:
                     date_str = f"{self.year}-{self.month:02d}-{day:02d}"
                     self.select_callback(date_str)
 
 
 class MaintenanceCalendar(tk.Toplevel):
-    def __init__(self, parent):
+    def __init__(self, parent, worker, months):
         super().__init__(parent)
+        self.worker = worker
+        self.months = months
         self.title("Maintenance History Calendar")
         self.geometry("900x650") # Slightly taller for buttons
         
@@ -146,14 +215,11 @@ class MaintenanceCalendar(tk.Toplevel):
         calendar_frame = ttk.Frame(self)
         calendar_frame.pack(side='left', padx=10, pady=10, fill='both', expand=True)
         
-        self.maintenance_equipment_map = {}
         self.year = datetime.now().year
         self.month = datetime.now().month
         self.current_selected_date_str = None
         
-        self.load_maintenance_dates()
-        
-        self.cal = CanvasCalendar(calendar_frame, self.year, self.month, self.maintenance_equipment_map, self.show_maintenance_info)
+        self.cal = CanvasCalendar(calendar_frame, self.year, self.month, {}, self.show_maintenance_info)
         self.cal.pack(fill='both', expand=True)
         
         info_frame = ttk.Frame(self)
@@ -183,82 +249,133 @@ class MaintenanceCalendar(tk.Toplevel):
         ttk.Button(btn_frame, text="Add", command=self.add_record).pack(side='left', padx=5, expand=True, fill='x')
         ttk.Button(btn_frame, text="Edit", command=self.edit_record).pack(side='left', padx=5, expand=True, fill='x')
         ttk.Button(btn_frame, text="Delete", command=self.delete_record).pack(side='left', padx=5, expand=True, fill='x')
+        
+        # Planned services overlay (see planner.py)
+        self.show_plan = tk.BooleanVar(value=False)
+        ttk.Checkbutton(info_frame, text="Show planned services", variable=self.show_plan, command=self.toggle_plan).pack(anchor='w')
+        self.plan_label = ttk.Label(info_frame, text="", font=FONTS['small'], wraplength=220)
+        self.plan_label.pack(anchor='w', pady=(2, 0))
+        
+        self.load_maintenance_dates()
 
     def load_maintenance_dates(self):
-        two_months_ago = datetime.now() - timedelta(days=60)
-        two_months_ago_str = two_months_ago.strftime('%Y-%m-%d')
-        self.maintenance_equipment_map.clear()
-        
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT m.maintenance_date, e.type, GROUP_CONCAT(e.id)
-                FROM maintenance_history m
-                JOIN equipment e ON m.equipment_id = e.id
-                WHERE m.maintenance_date >= ?
-                GROUP BY m.maintenance_date, e.type
-            ''', (two_months_ago_str,))
-            
-            for date, eq_type, equipment_ids in cursor.fetchall():
-                if date not in self.maintenance_equipment_map:
-                    self.maintenance_equipment_map[date] = {'QC': [], 'ARMGC': []}
-                
-                if equipment_ids:
-                    # Filter out any lingering None or empty strings if specific DB implementations do something weird
-                    ids = [x for x in equipment_ids.replace(' ', '').split(',') if x]
-                    # Map to the correct list
-                    if eq_type in self.maintenance_equipment_map[date]:
-                        self.maintenance_equipment_map[date][eq_type].extend(ids)
-                
-        if hasattr(self, 'cal'):
-            self.cal.equipment_map = self.maintenance_equipment_map
-            self.cal.draw_calendar()
+        """
+        Shows the displayed month from the shared month cache, or queries
+        just that month's date range in the background.
+        Returns True if the month was drawn from the cache.
+        """
+        data = self.months.get(self.year, self.month)
+        if data is not None:
+            self.worker.cancel(('calendar_month', str(self)))
+            self._apply_month(data)
+        else:
+            self.worker.submit(
+                self.months.load, self.year, self.month,
+                key=('calendar_month', str(self)), owner=self, on_done=self._apply_month
+            )
+        self.prefetch_adjacent_months()
+        return data is not None
+
+    def prefetch_adjacent_months(self):
+        for year, month in adjacent_months(self.year, self.month):
+            if (year, month) not in self.months:
+                self.worker.submit(self.months.load, year, month, key=('calendar_prefetch', year, month), quiet=True)
+
+    def _apply_month(self, data):
+        if (data.year, data.month) != (self.year, self.month):
+            return  # The user has already moved on
+        self.cal.equipment_map = data.equipment_map
+        self.cal.draw_calendar()
 
     def show_maintenance_info(self, date_str):
+        # Day details come from the cached month; the database is only hit
+        # when that month is not cached yet
         self.current_selected_date_str = date_str
+        year, month = month_of(date_str)
+        data = self.months.get(year, month)
+        if data is not None:
+            self.worker.cancel(('calendar_day', str(self)))
+            self._fill_history(data.days.get(date_str, []))
+        else:
+            self.worker.submit(
+                self.months.load, year, month,
+                key=('calendar_day', str(self)), owner=self,
+                on_done=lambda data: self._fill_history(data.days.get(date_str, []))
+            )
+
+    def _fill_history(self, rows):
         for item in self.tree.get_children():
             self.tree.delete(item)
             
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT e.type, m.equipment_id, m.maintenance_date
-                FROM maintenance_history m
-                JOIN equipment e ON m.equipment_id = e.id
-                WHERE m.maintenance_date = ?
-                ORDER BY e.type DESC, m.equipment_id
-            ''', (date_str,))
-            
-            for row in cursor.fetchall():
-                self.tree.insert('', 'end', values=row)
+        # rows are (type, equipment_id, date, record id); the record id is the iid
+        for eq_type, eq_id, date_str, record_id in rows:
+            self.tree.insert('', 'end', iid=str(record_id), values=(eq_type, eq_id, date_str))
 
-    def prev_month(self):
-        if self.month == 1:
-            self.year -= 1
-            self.month = 12
+    def reload(self):
+        """Re-reads the shown month and selected day after the data changed elsewhere."""
+        self.load_maintenance_dates()
+        if self.current_selected_date_str:
+            self.show_maintenance_info(self.current_selected_date_str)
+        if self.show_plan.get():
+            self.load_plan()
+
+    def toggle_plan(self):
+        if self.show_plan.get():
+            self.load_plan()
         else:
-            self.month -= 1
+            self.worker.cancel(('calendar_plan', str(self)))
+            self.cal.plan_map = {}
+            self.cal.draw_calendar()
+            self.plan_label.config(text="")
+
+    def load_plan(self):
+        # Planning reads the equipment table, so it runs on the worker too
+        self.worker.submit(plan_maintenance, key=('calendar_plan', str(self)), owner=self, on_done=self._apply_plan)
+
+    def _apply_plan(self, plan):
+        if not self.show_plan.get():
+            return
+        self.cal.plan_map = plan.by_date()
+        self.cal.draw_calendar()
+        overdue = sum(plan.overdue_days.values())
+        unplanned = sum(plan.unplanned_overdue_days.values())
+        self.plan_label.config(
+            text=f"{len(plan.services)} services planned until {date.fromordinal(plan.end).isoformat()}: "
+                 f"{overdue} overdue unit-days (without plan: {unplanned})"
+        )
+
+    def prev_month(self):
+        (self.year, self.month), _ = adjacent_months(self.year, self.month)
         self.refresh_calendar()
 
     def next_month(self):
-        if self.month == 12:
-            self.year += 1
-            self.month = 1
-        else:
-            self.month += 1
+        _, (self.year, self.month) = adjacent_months(self.year, self.month)
         self.refresh_calendar()
 
     def refresh_calendar(self):
-        self.load_maintenance_dates()
         self.cal.year = self.year
         self.cal.month = self.month
         self.cal.selected_day = None
-        self.cal.draw_calendar()
+        if not self.load_maintenance_dates():
+            # Show the empty grid now; the cells fill in when the month arrives
+            self.cal.equipment_map = {}
+            self.cal.draw_calendar()
         
         # Clear selection and tree
         self.current_selected_date_str = None
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.worker.cancel(('calendar_day', str(self)))
+        self._fill_history([])
+
+    def _run_write(self, func, *args, refresh_date):
+        # Writes go through the worker too; the view refreshes once committed
+        def on_done(_):
+            self.refresh_calendar()
+            self.show_maintenance_info(refresh_date)
+        
+        self.worker.submit(
+            func, *args, owner=self, on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Error", str(e), parent=self)
+        )
     
     # -------------------------------------------------------------------------
     # Actions
@@ -270,12 +387,8 @@ class MaintenanceCalendar(tk.Toplevel):
 
         eq_id = simpledialog.askinteger("Add Maintenance", "Enter Equipment ID (e.g., 211):", parent=self)
         if eq_id:
-            try:
-                add_maintenance_history(eq_id, self.current_selected_date_str)
-                self.refresh_calendar()
-                self.show_maintenance_info(self.current_selected_date_str) # Refresh list
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            date_str = self.current_selected_date_str
+            self._run_write(add_maintenance_history, eq_id, date_str, refresh_date=date_str)
 
     def edit_record(self):
         selected = self.tree.selection()
@@ -290,12 +403,7 @@ class MaintenanceCalendar(tk.Toplevel):
         
         new_id = simpledialog.askinteger("Edit Maintenance", f"Enter new Equipment ID (Current: {old_id}):", parent=self, initialvalue=old_id)
         if new_id and new_id != old_id:
-            try:
-                update_maintenance_history(old_id, new_id, date_str)
-                self.refresh_calendar()
-                self.show_maintenance_info(date_str)
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            self._run_write(update_maintenance_history, old_id, new_id, date_str, refresh_date=date_str)
 
     def delete_record(self):
         selected = self.tree.selection()
@@ -308,10 +416,5 @@ class MaintenanceCalendar(tk.Toplevel):
         date_str = item['values'][2]
         
         if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete maintenance record for Unit {eq_id}?"):
-            try:
-                delete_maintenance_history(eq_id, date_str)
-                self.refresh_calendar()
-                self.show_maintenance_info(date_str)
-            except Exception as e:
-                messagebox.showerror("Error", str(e))
+            self._run_write(delete_maintenance_history, eq_id, date_str, refresh_date=date_str)
 
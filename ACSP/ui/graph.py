@@ -1,12 +1,43 @@
+import math
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime
-from ..database import get_connection
+from ..core import bin_days
 from .styles import COLORS, FONTS
+from .trend import TrendGraph
 
 class OverdueGraph(tk.Toplevel):
-    def __init__(self, parent):
+    RESIZE_DEBOUNCE_MS = 60
+    # Below this bar width, units are aggregated into binned columns
+    MIN_BAR_PX = 4
+    BIN_PX = 16
+    # Label every column only when it is at least this wide
+    LABEL_PX = 22
+    MAX_SLOT_PX = 60
+    ZOOM_STEP = 1.5
+    # Graph margins
+    LEFT_MARGIN = 50
+    RIGHT_MARGIN = 20
+    TOP_MARGIN = 60
+    BOTTOM_MARGIN = 50
+
+    def __init__(self, parent, worker, fleet, trends):
         super().__init__(parent)
+        self.worker = worker
+        self.fleet = fleet
+        self.trends = trends
+        # Data of the current filter, kept between draws
+        self.data = None
+        self.counts = (0, 0, 0)
+        self.items = None
+        self.layout_size = None
+        self.resize_after_id = None
+        # Viewport: zoom 1.0 fits every unit; view_start is the left edge
+        # as a fraction of the whole fleet
+        self.zoom = 1.0
+        self.view_start = 0.0
+        self.columns_cache = {}
+        # Reusable canvas items for the visible columns only
+        self.bar_pool = []
         self.title("Overdue Graph")
         self.geometry("1400x600")
         
@@ -30,6 +61,14 @@ class OverdueGraph(tk.Toplevel):
         self.btn_qc = ttk.Button(filter_frame, text="QC", command=lambda: self.switch_filter('QC'))
         self.btn_qc.pack(side='left', padx=2)
         
+        # Zoom controls (Ctrl+wheel zooms, wheel scrolls)
+        zoom_frame = ttk.Frame(self.header_frame)
+        zoom_frame.pack(side='left')
+        ttk.Button(zoom_frame, text="−", width=3, command=lambda: self.zoom_by(1 / self.ZOOM_STEP)).pack(side='left', padx=2)
+        ttk.Button(zoom_frame, text="+", width=3, command=lambda: self.zoom_by(self.ZOOM_STEP)).pack(side='left', padx=2)
+        ttk.Button(zoom_frame, text="Fit", command=self.zoom_fit).pack(side='left', padx=2)
+        ttk.Button(zoom_frame, text="Trend", command=self.open_trend).pack(side='left', padx=(10, 2))
+        
         
         legend_frame = ttk.Frame(self.header_frame)
         legend_frame.pack(side='right')
@@ -43,7 +82,11 @@ class OverdueGraph(tk.Toplevel):
         self.canvas_container.pack(fill='both', expand=True)
         
         self.canvas = tk.Canvas(self.canvas_container, bg='white')
+        self.xscroll = ttk.Scrollbar(self.canvas_container, orient='horizontal', command=self.on_xview)
+        self.xscroll.pack(side='bottom', fill='x')
         self.canvas.pack(fill='both', expand=True)
+        self.canvas.bind('<MouseWheel>', self.on_mousewheel)
+        self.canvas.bind('<Control-MouseWheel>', self.on_zoom_wheel)
         
         # Bind resize event
         self.canvas.bind('<Configure>', self.on_resize)
@@ -57,9 +100,16 @@ class OverdueGraph(tk.Toplevel):
         tk.Frame(f, width=15, height=15, bg=color).pack(side='left', padx=(0, 5))
         ttk.Label(f, text=text).pack(side='left')
 
+    def open_trend(self):
+        # Parented to the root so the app's reload_windows() reaches it
+        TrendGraph(self.master, self.worker, self.trends, self.current_filter)
+
     def switch_filter(self, filter_val):
         self.current_filter = filter_val
         self.update_buttons()
+        self.data = None
+        self.zoom = 1.0
+        self.view_start = 0.0
         self.draw_graph()
         
     def update_buttons(self):
@@ -70,126 +120,321 @@ class OverdueGraph(tk.Toplevel):
             self.btn_armgc.state(['!pressed'])
             self.btn_qc.state(['pressed'])
 
-    def on_resize(self, event):
+    def reload(self):
+        """Redraws after the data changed elsewhere."""
         self.draw_graph()
 
+    def on_resize(self, event):
+        # Coalesce the stream of <Configure> events during a window drag;
+        # a resize only repositions the existing items
+        if self.resize_after_id is not None:
+            self.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.after(self.RESIZE_DEBOUNCE_MS, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        self.resize_after_id = None
+        if self.data is None:
+            self.draw_graph()
+        else:
+            self.layout_graph()
+
     def draw_graph(self):
+        # Shares the dashboard's cached snapshot; loads in the background if stale
+        snapshot = self.fleet.snapshot
+        if snapshot is not None:
+            self._set_data(snapshot)
+        else:
+            self.worker.submit(self.fleet.load, key=('graph', str(self)), owner=self, on_done=self._set_data)
+
+    def _set_data(self, snapshot):
+        data = [(row[0], row[3]) for row in snapshot.select(self.current_filter)]
+        if data == self.data and self.items:
+            return  # Nothing changed for this view
+        self.data = data
+        self.counts = snapshot.counts(self.current_filter)
+        self._create_items()
+        self.layout_graph()
+
+    # -------------------------------------------------------------------------
+    # Retained drawing: items are created per data set, positioned per size
+    # -------------------------------------------------------------------------
+    def _create_items(self):
         self.canvas.delete('all')
+        self.items = {}
+        self.bar_pool = []
+        self.columns_cache = {}
+        self.layout_size = None
+        data = self.data
         
-        # Get Current Dimensions
-        width = self.canvas.winfo_width()
-        height = self.canvas.winfo_height()
-        
-        if width < 100 or height < 100:
-            return  # Wait for valid size
-            
-        # Fetch Data
-        data = []
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            # We need to handle potential schema mismatch if 'type' wasn't there before commit/restart, 
-            # but previous step ensured column exists.
-            cursor.execute('SELECT id, last_maintenance_date, type FROM equipment ORDER BY id')
-            rows = cursor.fetchall()
-            
-        today = datetime.now()
-        for row in rows:
-            eq_id = row[0]
-            last_date_str = row[1]
-            eq_type = row[2] if len(row) > 2 else 'ARMGC'
-            
-            # Filter
-            if eq_type != self.current_filter:
-                continue
-                
-            last_date = datetime.strptime(last_date_str, '%Y-%m-%d')
-            days_passed = (today - last_date).days
-            data.append((eq_id, days_passed))
-            
         if not data:
-            self.canvas.create_text(width/2, height/2, text=f"No {self.current_filter} Data Available")
+            self.items['empty'] = self.canvas.create_text(0, 0, text=f"No {self.current_filter} Data Available")
             return
             
         # Calculate Overdue Rate
-        total_count = len(data)
-        overdue_count = len([d for d in data if d[1] > 45])
+        total_count, overdue_count, _ = self.counts
         rate = (overdue_count / total_count * 100) if total_count > 0 else 0
-
-            
-        # Layout Calculations
-        left_margin = 50
-        right_margin = 20
-        top_margin = 60
-        bottom_margin = 50
-        
-        graph_width = width - left_margin - right_margin
-        graph_height = height - top_margin - bottom_margin
-        base_y = height - bottom_margin
-        
-        # Determine bar width dynamically
-        num_items = len(data)
-        item_width = graph_width / num_items
-        bar_width = item_width * 0.6  # 60% bar, 40% gap
-        gap = item_width * 0.4
         
         # Determine logical max Y for scaling
         max_days = max([d[1] for d in data]) if data else 50
-        max_days = max(max_days, 60) # Minimum scale to 60 days
+        self.max_days = max(max_days, 60) # Minimum scale to 60 days
         
-        scale_factor = graph_height / max_days
+        # Axes
+        self.items['y_axis'] = self.canvas.create_line(0, 0, 0, 0, fill='black', width=2)
+        self.items['x_axis'] = self.canvas.create_line(0, 0, 0, 0, fill='black', width=2)
         
-        # Draw Axes
-        self.canvas.create_line(left_margin, top_margin, left_margin, base_y, fill='black', width=2) # Y-Axis
-        self.canvas.create_line(left_margin, base_y, width - right_margin, base_y, fill='black', width=2) # X-Axis
+        # Grid lines (every 10 days)
+        self.items['grid'] = [
+            (d,
+             self.canvas.create_line(0, 0, 0, 0, fill='#eee', dash=(2, 2)),
+             self.canvas.create_text(0, 0, text=str(d), anchor='e', font=('Arial', 8)))
+            for d in range(0, self.max_days + 1, 10)
+        ]
         
-        # Draw Grid lines (every 10 days)
-        for d in range(0, max_days + 1, 10):
+        # Threshold Line (45 days)
+        self.items['limit_line'] = self.canvas.create_line(0, 0, 0, 0, fill='#FFA500', dash=(4, 4), width=1)
+        self.items['limit_text'] = self.canvas.create_text(0, 0, text="45 Days Limit", fill='#FFA500', anchor='e', font=('Arial', 9, 'bold'))
+        
+        # Overdue Rate with a blue border
+        self.items['rate_text'] = self.canvas.create_text(
+            0, 0,
+            text=f"Overdue Rate: {rate:.1f}% ({overdue_count}대/{total_count}대)",
+            anchor='e', font=('Arial', 20, 'bold'), fill='#FF0000')
+        self.items['rate_border'] = self.canvas.create_rectangle(0, 0, 0, 0, outline='blue', width=2)
+
+    def layout_graph(self):
+        if not self.items:
+            return
+            
+        # Get Current Dimensions
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        
+        if width < 100 or height < 100:
+            return  # Wait for valid size
+        if self.layout_size == (width, height):
+            return
+        self.layout_size = (width, height)
+        
+        coords = self.canvas.coords
+        if 'empty' in self.items:
+            coords(self.items['empty'], width/2, height/2)
+            self.xscroll.set(0, 1)
+            return
+            
+        # Layout Calculations
+        left_margin = self.LEFT_MARGIN
+        right_margin = self.RIGHT_MARGIN
+        top_margin = self.TOP_MARGIN
+        graph_height = height - top_margin - self.BOTTOM_MARGIN
+        base_y = height - self.BOTTOM_MARGIN
+        scale_factor = graph_height / self.max_days
+        
+        # Axes
+        coords(self.items['y_axis'], left_margin, top_margin, left_margin, base_y)
+        coords(self.items['x_axis'], left_margin, base_y, width - right_margin, base_y)
+        
+        # Grid lines
+        for d, line, text in self.items['grid']:
             y = base_y - (d * scale_factor)
-            self.canvas.create_line(left_margin - 5, y, width - right_margin, y, fill='#eee', dash=(2, 2))
-            self.canvas.create_text(left_margin - 10, y, text=str(d), anchor='e', font=('Arial', 8))
+            coords(line, left_margin - 5, y, width - right_margin, y)
+            coords(text, left_margin - 10, y)
             
-        # Draw Threshold Line (45 days)
+        # Threshold Line
         y_45 = base_y - (45 * scale_factor)
-        self.canvas.create_line(left_margin, y_45, width - right_margin, y_45, fill='#FFA500', dash=(4, 4), width=1)
-        self.canvas.create_text(width - right_margin - 10, y_45 - 20, text="45 Days Limit", fill='#FFA500', anchor='e', font=('Arial', 9, 'bold'))
-
-        # Draw Overdue Rate
-        rate_text = self.canvas.create_text(width - right_margin, top_margin - 30, 
-                              text=f"Overdue Rate: {rate:.1f}% ({overdue_count}대/{total_count}대)", 
-                              anchor='e', font=('Arial', 20, 'bold'), fill='#FF0000')
+        coords(self.items['limit_line'], left_margin, y_45, width - right_margin, y_45)
+        coords(self.items['limit_text'], width - right_margin - 10, y_45 - 20)
         
-        # Draw Blue Border
-        bbox = self.canvas.bbox(rate_text)
+        # Overdue Rate
+        coords(self.items['rate_text'], width - right_margin, top_margin - 30)
+        bbox = self.canvas.bbox(self.items['rate_text'])
         if bbox:
             p = 10 # padding
-            self.canvas.create_rectangle(bbox[0]-p, bbox[1]-p, bbox[2]+p, bbox[3]+p, outline='blue', width=2)
+            coords(self.items['rate_border'], bbox[0]-p, bbox[1]-p, bbox[2]+p, bbox[3]+p)
+        
+        self.draw_bars()
 
-        # Draw Bars
-        current_x = left_margin + (gap / 2)
+    # -------------------------------------------------------------------------
+    # Bars: only the columns inside the viewport get canvas items
+    # -------------------------------------------------------------------------
+    def _viewport(self):
+        """Returns (graph_width, column width, columns, left edge in px)."""
+        width, _ = self.layout_size
+        graph_width = width - self.LEFT_MARGIN - self.RIGHT_MARGIN
+        num_items = len(self.data)
+        slot = graph_width * self.zoom / num_items
         
-        for eq_id, days in data:
-            blue_h = min(days, 45) * scale_factor
-            red_h = max(0, days - 45) * scale_factor
-            
-            x0 = current_x
-            x1 = current_x + bar_width
-            
-            # Blue Bar
-            self.canvas.create_rectangle(x0, base_y - blue_h, x1, base_y, fill='#87CEEB', outline='')
-            
-            # Red Bar
-            if red_h > 0:
-                y_red_base = base_y - blue_h
-                self.canvas.create_rectangle(x0, y_red_base - red_h, x1, y_red_base, fill='#FF0000', outline='')
-                
-            # X-Axis Labels
-            font_size = 8 if bar_width < 15 else 9
-            self.canvas.create_text((x0 + x1)/2, base_y + 15, text=str(eq_id), font=('Arial', font_size))
+        # Level of detail: aggregate when single bars would be too thin
+        bin_size = 1 if slot >= self.MIN_BAR_PX else math.ceil(self.BIN_PX / slot)
+        columns = self._columns(bin_size)
+        column_width = slot * bin_size
+        content_width = len(columns) * column_width
+        offset = min(self.view_start * content_width, max(0, content_width - graph_width))
+        return graph_width, column_width, columns, max(0, offset)
+
+    def _columns(self, bin_size):
+        """
+        (label, min days, max days, overdue count, unit count) per column,
+        one unit per column or bin_size units binned together. Cached per
+        data set.
+        """
+        columns = self.columns_cache.get(bin_size)
+        if columns is None:
+            labels = [str(eq_id) for eq_id, _ in self.data[::bin_size]]
+            mins, maxs, overdue, sizes = bin_days([d for _, d in self.data], bin_size)
+            columns = list(zip(labels, mins, maxs, overdue, sizes))
+            self.columns_cache[bin_size] = columns
+        return columns
+
+    def draw_bars(self):
+        if not self.layout_size or not self.data:
+            return
+        width, height = self.layout_size
+        graph_width, column_width, columns, offset = self._viewport()
+        base_y = height - self.BOTTOM_MARGIN
+        scale_factor = (height - self.TOP_MARGIN - self.BOTTOM_MARGIN) / self.max_days
+        left = self.LEFT_MARGIN
+        right = width - self.RIGHT_MARGIN
+        
+        first = int(offset // column_width)
+        last = min(len(columns), math.ceil((offset + graph_width) / column_width))
+        visible = columns[first:last]
+        self._ensure_pool(len(visible))
+        
+        bar_width = column_width * 0.6  # 60% bar, 40% gap
+        gap = column_width * 0.4
+        binned = columns[0][4] > 1 if columns else False
+        # Thin columns only label every Nth one (by absolute index, so
+        # labels do not jump while scrolling)
+        label_every = max(1, math.ceil(self.LABEL_PX / column_width))
+        font_size = 8 if bar_width < 15 else 9
+        show_values = bar_width > 12
+        
+        coords = self.canvas.coords
+        for slot_idx, (label, min_days, max_days, overdue, count) in enumerate(visible):
+            index = first + slot_idx
+            x0 = left + index * column_width - offset + gap / 2
+            x1 = x0 + bar_width
+            # Clip columns cut by the viewport edges
+            x0, x1 = max(x0, left), min(x1, right)
+            blue, red, marker, label_item, value_item = self.bar_pool[slot_idx].items
+            if x1 <= x0:
+                self.bar_pool[slot_idx].hide(self.canvas)
+                continue
             
-            # Value Label
-            total_h = blue_h + red_h
-            if bar_width > 12:
-                self.canvas.create_text((x0 + x1)/2, base_y - total_h - 10, text=str(days), font=('Arial', font_size, 'bold'))
+            blue_h = min(max_days, 45) * scale_factor
+            red_h = max(0, max_days - 45) * scale_factor
+            coords(blue, x0, base_y - blue_h, x1, base_y)
+            coords(red, x0, base_y - blue_h - red_h, x1, base_y - blue_h)
+            # Bins mark the shortest interval inside them
+            min_y = base_y - min_days * scale_factor
+            coords(marker, x0, min_y, x1, min_y)
+            coords(label_item, (x0 + x1)/2, base_y + 15)
+            coords(value_item, (x0 + x1)/2, base_y - blue_h - red_h - 10)
             
-            current_x += item_width
+            self.bar_pool[slot_idx].update(
+                self.canvas,
+                red=red_h > 0,
+                marker=binned,
+                label=label if index % label_every == 0 else "",
+                value=(str(overdue) if overdue else "") if binned else str(max_days),
+                value_fill='#FF0000' if binned else 'black',
+                show_value=show_values,
+                font_size=font_size,
+            )
+        
+        for group in self.bar_pool[len(visible):]:
+            group.hide(self.canvas)
+        
+        content_width = len(columns) * column_width
+        if content_width > 0:
+            self.xscroll.set(offset / content_width, min(1.0, (offset + graph_width) / content_width))
+
+    def _ensure_pool(self, count):
+        # Grows only; item count stays bounded by the viewport width
+        while len(self.bar_pool) < count:
+            self.bar_pool.append(BarItems(self.canvas))
+
+    # -------------------------------------------------------------------------
+    # Scrolling and zoom
+    # -------------------------------------------------------------------------
+    def on_xview(self, *args):
+        if not self.layout_size or not self.data:
+            return
+        graph_width, column_width, columns, offset = self._viewport()
+        content_width = len(columns) * column_width
+        if args[0] == 'moveto':
+            start = float(args[1])
+        else:
+            step = column_width if args[2] == 'units' else graph_width
+            start = (offset + int(args[1]) * step) / content_width
+        self._scroll_to(start, graph_width / content_width)
+
+    def _scroll_to(self, start, visible_fraction):
+        self.view_start = min(max(0.0, start), max(0.0, 1.0 - visible_fraction))
+        self.draw_bars()
+
+    def on_mousewheel(self, event):
+        self.on_xview('scroll', -1 if event.delta > 0 else 1, 'units')
+
+    def on_zoom_wheel(self, event):
+        self.zoom_by(self.ZOOM_STEP if event.delta > 0 else 1 / self.ZOOM_STEP, anchor_x=event.x)
+
+    def zoom_by(self, factor, anchor_x=None):
+        if not self.layout_size or not self.data:
+            return
+        width, _ = self.layout_size
+        graph_width = width - self.LEFT_MARGIN - self.RIGHT_MARGIN
+        max_zoom = max(1.0, self.MAX_SLOT_PX * len(self.data) / graph_width)
+        zoom = min(max(1.0, self.zoom * factor), max_zoom)
+        if zoom == self.zoom:
+            return
+        
+        # Keep the unit under the anchor (default: viewport centre) in place
+        if anchor_x is None:
+            anchor_x = self.LEFT_MARGIN + graph_width / 2
+        anchor = min(max(0.0, (anchor_x - self.LEFT_MARGIN) / graph_width), 1.0)
+        old_visible = 1.0 / self.zoom
+        fleet_pos = self.view_start + anchor * old_visible
+        self.zoom = zoom
+        self._scroll_to(fleet_pos - anchor / zoom, 1.0 / zoom)
+
+    def zoom_fit(self):
+        self.zoom = 1.0
+        self._scroll_to(0.0, 1.0)
+
 
+class BarItems:
+    """
+    One reusable column of the graph: blue and red bar segments, a min
+    marker for binned columns, an id label and a value label. Text and
+    style are only pushed to Tk when they change.
+    """
+    def __init__(self, canvas):
+        self.items = (
+            canvas.create_rectangle(0, 0, 0, 0, fill='#87CEEB', outline=''),
+            canvas.create_rectangle(0, 0, 0, 0, fill='#FF0000', outline=''),
+            canvas.create_line(0, 0, 0, 0, fill=COLORS['primary'], width=2),
+            canvas.create_text(0, 0, text=""),
+            canvas.create_text(0, 0, text=""),
+        )
+        self.state = {}
+
+    def update(self, canvas, **state):
+        if state == self.state:
+            return
+        blue, red, marker, label, value = self.items
+        canvas.itemconfigure(blue, state='normal')
+        canvas.itemconfigure(red, state='normal' if state['red'] else 'hidden')
+        canvas.itemconfigure(marker, state='normal' if state['marker'] else 'hidden')
+        canvas.itemconfigure(label, text=state['label'], font=('Arial', state['font_size']), state='normal')
+        canvas.itemconfigure(value, text=state['value'], fill=state['value_fill'],
+                             font=('Arial', state['font_size'], 'bold'),
+                             state='normal' if state['show_value'] else 'hidden')
+        self.state = state
+
+    def hide(self, canvas):
+        if self.state.get('hidden'):
+            return
+        for item in self.items:
+            canvas.itemconfigure(item, state='hidden')
+        self.state = {'hidden': True}
@@ -0,0 +1,170 @@
+import tkinter as tk
+from tkinter import ttk
+from .styles import COLORS, FONTS
+
+class TrendGraph(tk.Toplevel):
+    """Daily overdue and warning rate over the whole maintenance history."""
+    RESIZE_DEBOUNCE_MS = 60
+    # Graph margins
+    LEFT_MARGIN = 50
+    RIGHT_MARGIN = 20
+    TOP_MARGIN = 60
+    BOTTOM_MARGIN = 40
+
+    def __init__(self, parent, worker, trends, eq_type='ARMGC'):
+        super().__init__(parent)
+        self.worker = worker
+        self.trends = trends
+        self.title("Overdue Trend")
+        self.geometry("1000x450")
+
+        self.current_filter = eq_type
+        self.points = None
+        self.layout_size = None
+        self.resize_after_id = None
+
+        main_frame = ttk.Frame(self)
+        main_frame.pack(fill='both', expand=True, padx=20, pady=20)
+
+        header_frame = ttk.Frame(main_frame)
+        header_frame.pack(fill='x', pady=(0, 10))
+        ttk.Label(header_frame, text="Overdue Rate Trend", font=FONTS['h2']).pack(side='left')
+
+        filter_frame = ttk.Frame(header_frame)
+        filter_frame.pack(side='left', padx=20)
+        self.btn_armgc = ttk.Button(filter_frame, text="ARMGC", command=lambda: self.switch_filter('ARMGC'))
+        self.btn_armgc.pack(side='left', padx=2)
+        self.btn_qc = ttk.Button(filter_frame, text="QC", command=lambda: self.switch_filter('QC'))
+        self.btn_qc.pack(side='left', padx=2)
+
+        legend_frame = ttk.Frame(header_frame)
+        legend_frame.pack(side='right')
+        self._create_legend_item(legend_frame, "Overdue rate", COLORS['danger'])
+        ttk.Label(legend_frame, text="  ").pack(side='left')
+        self._create_legend_item(legend_frame, "Warning rate", COLORS['warning'])
+
+        self.canvas = tk.Canvas(main_frame, bg='white')
+        self.canvas.pack(fill='both', expand=True)
+
+        # Retained items; only their coordinates change on resize
+        self.y_axis = self.canvas.create_line(0, 0, 0, 0, fill='black', width=2)
+        self.x_axis = self.canvas.create_line(0, 0, 0, 0, fill='black', width=2)
+        self.grid = [
+            (pct,
+             self.canvas.create_line(0, 0, 0, 0, fill='#eee', dash=(2, 2)),
+             self.canvas.create_text(0, 0, text=f"{pct}%", anchor='e', font=('Arial', 8)))
+            for pct in range(0, 101, 20)
+        ]
+        self.warning_line = self.canvas.create_line(0, 0, 0, 0, fill=COLORS['warning'], width=1, state='hidden')
+        self.overdue_line = self.canvas.create_line(0, 0, 0, 0, fill=COLORS['danger'], width=2, state='hidden')
+        self.start_label = self.canvas.create_text(0, 0, text="", anchor='nw', font=('Arial', 8))
+        self.end_label = self.canvas.create_text(0, 0, text="", anchor='ne', font=('Arial', 8))
+        self.summary = self.canvas.create_text(0, 0, text="", anchor='e', font=('Arial', 14, 'bold'), fill=COLORS['danger'])
+
+        self.canvas.bind('<Configure>', self.on_resize)
+        self.update_buttons()
+        self.reload()
+
+    def _create_legend_item(self, parent, text, color):
+        f = ttk.Frame(parent)
+        f.pack(side='left')
+        tk.Frame(f, width=15, height=4, bg=color).pack(side='left', padx=(0, 5))
+        ttk.Label(f, text=text).pack(side='left')
+
+    def switch_filter(self, filter_val):
+        self.current_filter = filter_val
+        self.update_buttons()
+        self.reload()
+
+    def update_buttons(self):
+        if self.current_filter == 'ARMGC':
+            self.btn_armgc.state(['pressed'])
+            self.btn_qc.state(['!pressed'])
+        else:
+            self.btn_armgc.state(['!pressed'])
+            self.btn_qc.state(['pressed'])
+
+    def reload(self):
+        """Fetches the trend; only days not yet cached are computed."""
+        self.worker.submit(
+            self.trends.trend, self.current_filter,
+            key=('trend', str(self)), owner=self, on_done=self._set_points
+        )
+
+    def _set_points(self, points):
+        self.points = points
+        self.layout_size = None
+        self.layout_graph()
+
+    def on_resize(self, event):
+        if self.resize_after_id is not None:
+            self.after_cancel(self.resize_after_id)
+        self.resize_after_id = self.after(self.RESIZE_DEBOUNCE_MS, self._on_resize_settled)
+
+    def _on_resize_settled(self):
+        self.resize_after_id = None
+        self.layout_graph()
+
+    def layout_graph(self):
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        if width < 100 or height < 100 or self.points is None:
+            return
+        if self.layout_size == (width, height):
+            return
+        self.layout_size = (width, height)
+
+        coords = self.canvas.coords
+        left = self.LEFT_MARGIN
+        right = width - self.RIGHT_MARGIN
+        base_y = height - self.BOTTOM_MARGIN
+        graph_width = right - left
+        graph_height = base_y - self.TOP_MARGIN
+
+        coords(self.y_axis, left, self.TOP_MARGIN, left, base_y)
+        coords(self.x_axis, left, base_y, right, base_y)
+        for pct, line, text in self.grid:
+            y = base_y - pct / 100 * graph_height
+            coords(line, left - 5, y, right, y)
+            coords(text, left - 10, y)
+
+        points = self.points
+        if not points:
+            for item in (self.overdue_line, self.warning_line):
+                self.canvas.itemconfigure(item, state='hidden')
+            self.canvas.itemconfigure(self.summary, text=f"No {self.current_filter} History Available")
+            coords(self.summary, right, self.TOP_MARGIN - 30)
+            return
+
+        # At most one vertex per pixel column; each keeps the worst day in it
+        # so short overdue spikes stay visible
+        columns = max(1, min(len(points), int(graph_width)))
+        per_column = len(points) / columns
+        overdue_xy = []
+        warning_xy = []
+        for col in range(columns):
+            chunk = points[int(col * per_column):max(int((col + 1) * per_column), int(col * per_column) + 1)]
+            x = left + (col + 0.5) * graph_width / columns
+            overdue_xy += [x, base_y - max(p.overdue_rate for p in chunk) / 100 * graph_height]
+            warning_xy += [x, base_y - max(p.warning_rate for p in chunk) / 100 * graph_height]
+        if columns == 1:
+            # A line needs two points
+            overdue_xy += [right, overdue_xy[1]]
+            warning_xy += [right, warning_xy[1]]
+        coords(self.overdue_line, *overdue_xy)
+        coords(self.warning_line, *warning_xy)
+        self.canvas.itemconfigure(self.overdue_line, state='normal')
+        self.canvas.itemconfigure(self.warning_line, state='normal')
+
+        self.canvas.itemconfigure(self.start_label, text=points[0].day.isoformat())
+        coords(self.start_label, left, base_y + 8)
+        self.canvas.itemconfigure(self.end_label, text=points[-1].day.isoformat())
+        coords(self.end_label, right, base_y + 8)
+
+        latest = points[-1]
+        self.canvas.itemconfigure(
+            self.summary,
+            text=f"Today: {latest.overdue_rate:.1f}% overdue ({latest.overdue}대/{latest.tracked}대), "
+                 f"avg {latest.mean_days:.0f} days since service"
+        )
+        coords(self.summary, right, self.TOP_MARGIN - 30)
@@ -0,0 +1,119 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DatabaseWorker:
+    """
+    Runs database calls on one background thread so the Tk main loop never
+    waits on SQLite. Results come back on the Tk thread: the worker thread
+    only puts them on a queue, which is drained by a root.after() poll
+    (tkinter calls are not safe from other threads).
+
+    Requests submitted with the same key coalesce. A newer request makes
+    older ones stale, so they are skipped if not yet started and their
+    results are dropped if they already ran.
+    """
+    POLL_MS = 20
+
+    def __init__(self, root, on_busy_change=None):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        # A single thread keeps writes serialised on one shared connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='acsp-db')
+        self._results = queue.Queue()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._busy = 0
+        self._poll_id = None
+        self._closed = False
+
+    def submit(self, func, *args, key=None, owner=None, on_done=None, on_error=None, quiet=False):
+        """
+        Runs func(*args) in the background. on_done(result) or on_error(exc)
+        is called on the Tk thread, unless a newer request with the same key
+        was submitted or the owner widget has been destroyed.
+        quiet requests (e.g. periodic polls) do not show the busy indicator.
+        """
+        if self._closed:
+            return
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            if key is not None:
+                self._generations[key] = generation
+
+        self._pending += 1
+        if not quiet:
+            self._set_busy(self._busy + 1)
+        job = (key, generation, owner, quiet)
+        self._executor.submit(self._run, job, func, args, on_done, on_error)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def cancel(self, key):
+        """Makes any outstanding request with this key stale."""
+        with self._lock:
+            if key in self._generations:
+                self._generations[key] += 1
+
+    def is_stale(self, key, generation):
+        if key is None:
+            return False
+        with self._lock:
+            return self._generations.get(key) != generation
+
+    def shutdown(self):
+        """Drops queued work and waits for the running call to finish."""
+        self._closed = True
+        if self._poll_id is not None:
+            self.root.after_cancel(self._poll_id)
+            self._poll_id = None
+        self._executor.shutdown(wait=True)
+
+    # -------------------------------------------------------------------------
+    # Internals
+    # -------------------------------------------------------------------------
+    def _run(self, job, func, args, on_done, on_error):
+        key, generation = job[0], job[1]
+        if self._closed or self.is_stale(key, generation):
+            self._results.put((job, None, None, None, None))
+            return
+        try:
+            result = func(*args)
+        except Exception as e:
+            self._results.put((job, None, on_error, None, e))
+        else:
+            self._results.put((job, on_done, None, result, None))
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                job, on_done, on_error, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            key, generation, owner, quiet = job
+            self._pending -= 1
+            if not quiet:
+                self._set_busy(self._busy - 1)
+            if self.is_stale(key, generation):
+                continue
+            if owner is not None and not owner.winfo_exists():
+                continue
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    self.root.report_callback_exception(type(error), error, error.__traceback__)
+            elif on_done:
+                on_done(result)
+
+        if self._pending > 0 and not self._closed:
+            self._poll_id = self.root.after(self.POLL_MS, self._poll)
+
+    def _set_busy(self, count):
+        was_busy = self._busy > 0
+        self._busy = count
+        if self.on_busy_change and was_busy != (count > 0):
+            self.on_busy_change(count > 0)